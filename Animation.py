@@ -0,0 +1,131 @@
+"""
+# Animation.py
+# Data-driven sprite animations advanced from a single deadline heap
+"""
+
+from Clock import SYSTEM_CLOCK
+from DeadlineHeap import DeadlineHeap
+
+
+class Animation:
+    """
+    A sequence of frames shown at a fixed interval.
+
+    Parameters
+    ----------
+    name: used for debugging only
+    frames: list of frames (any objects, usually packed sprites)
+    interval: time each frame is shown, in ms
+    loops: how many times the sequence plays before the animation
+        finishes. 0 plays it forever.
+    on_finish: event passed to the engine handler's animationFinished
+        method when the animation finishes
+    follow: another Animation that is started as soon as this one
+        finishes (e.g. a looping ghost after the death sequence)
+    """
+
+    def __init__(self, name, frames, interval, loops=0, on_finish=None, follow=None):
+        self.name = name
+        self.frames = frames
+        self.interval = interval
+        self.loops = loops
+        self.on_finish = on_finish
+        self.follow = follow
+        self.index = 0
+        self.loop = 0
+        self.active = False
+        # bumped on every start/stop so stale heap entries can be skipped
+        self._gen = 0
+
+    def frame(self):
+        """ The frame that should currently be shown """
+
+        return self.frames[self.index]
+
+
+class AnimationEngine:
+    """
+    Advances any number of animations from one DeadlineHeap of next-frame
+    deadlines. Idle animations have no heap entry and cost nothing, and
+    each frame update is a heap pop and push, O(log n).
+
+    The handler (optional) must implement animationFinished(anim, event),
+    which is called whenever an animation with loops > 0 completes.
+    clock defaults to the system clock.
+    """
+
+    def __init__(self, handler=None, clock=None):
+        self._handler = handler
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._heap = DeadlineHeap(self._clock)
+        self.frames = 0
+
+    def _time(self, now):
+        return self._heap.time(now)
+
+    def _schedule(self, anim, deadline):
+        self._heap.push(anim, deadline)
+
+    def start(self, anim, now):
+        """ (Re)start an animation from its first frame """
+
+        t = self._time(now)
+        anim.index = 0
+        anim.loop = 0
+        anim.active = True
+        anim._gen += 1
+        self._schedule(anim, t + anim.interval)
+
+    def stop(self, anim):
+        """ Stop an animation without calling its on_finish handler """
+
+        anim.active = False
+        anim._gen += 1
+
+    def next_due(self, now):
+        """ ms until the next frame is due, 0 if overdue, -1 if nothing is running """
+
+        t = self._time(now)
+        deadline = self._heap.nextDeadline()
+        if deadline is None:
+            return -1
+        return deadline - t if deadline > t else 0
+
+    def update(self, now):
+        """ Advance every animation whose deadline has passed, returns True if any frame changed """
+
+        t = self._time(now)
+        heap = self._heap
+        changed = False
+        while True:
+            entry = heap.pop(t)
+            if entry is None:
+                break
+            deadline, seq, gen, anim = entry
+            changed = True
+            self.frames += 1
+            self._advance(anim, deadline, t)
+        return changed
+
+    def _advance(self, anim, deadline, t):
+        anim.index += 1
+        if anim.index >= len(anim.frames):
+            anim.index = 0
+            anim.loop += 1
+            if anim.loops and anim.loop >= anim.loops:
+                anim.active = False
+                if anim.follow is not None:
+                    follow = anim.follow
+                    follow.index = 0
+                    follow.loop = 0
+                    follow.active = True
+                    follow._gen += 1
+                    self._schedule(follow, deadline + follow.interval)
+                if self._handler is not None:
+                    self._handler.animationFinished(anim, anim.on_finish)
+                return
+        nxt = deadline + anim.interval
+        if nxt <= t:
+            # the loop fell behind - don't burst through the missed frames
+            nxt = t + anim.interval
+        self._schedule(anim, nxt)
@@ -7,6 +7,7 @@
 from machine import Pin, ADC
 import time
 from Log import *
+from Clock import SYSTEM_CLOCK
 
 class Button:
     """
@@ -16,31 +17,40 @@ class Button:
     to handle the push and release of the button.
     The name of the button will be passed back to the handler to identify
     which button was pressed/released
+    clock is used for debouncing and defaults to the system clock
+
+    If an EventQueue is passed as queue, the interrupt handler only pushes
+    the edge into the queue, and the handler is called later, when the main
+    loop calls queue.drain(). Without a queue, the handler is called directly
+    from the interrupt.
     """
     
-    def __init__(self, pin, name, *, handler=None, lowActive=True):
+    def __init__(self, pin, name, *, handler=None, lowActive=True, clock=None, queue=None):
         """
         Initialize attributes and other internal data
         """
         
         self._pinNo = pin
         self._name = name
-        Log.i(f'Button constructor: create button {name} at pin {pin}')
+        Log.i('Button constructor: create button %s at pin %s', name, pin)
         if lowActive:
             self._pin = Pin(pin, Pin.IN, Pin.PULL_UP)
         else:
             self._pin = Pin(pin, Pin.IN, Pin.PULL_DOWN)
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
         self._debounce_time = 0
         self._lowActive = lowActive
         self._lastStatus = None
         self._handler = None
+        self._queue = None
+        self.setQueue(queue)
         self.setHandler(handler)
         
     def isPressed(self):
         """ Check if the button is pressed or not - useful if polling """
         
         status = (self._lowActive and self._pin.value() ==0) or (not self._lowActive and self._pin.value() == 1)
-        Log.i(f'Button {self._name} isPressed: {status}')
+        Log.i('Button %s isPressed: %s', self._name, status)
         return status
     
     def setHandler(self, handler):
@@ -58,23 +68,42 @@ class Button:
         if self._handler:
             self._pin.irq(trigger = Pin.IRQ_FALLING | Pin.IRQ_RISING, handler = self._callback)
         
+    def setQueue(self, queue):
+        """
+        Route events through an EventQueue instead of calling the handler
+        from the interrupt. Pass None to go back to direct calls.
+        """
+
+        self._queue = queue
+        if queue is not None:
+            self._queueId = queue.register(self)
+
     def _callback(self, pin):
         """ The private interrupt handler - will call appropriate handlers """
         
-        t = time.ticks_ms()
+        t = self._clock.ticks_ms()
         v = self._pin.value()
-        if ((self._lastStatus == None or self._lastStatus != v) and t-self._debounce_time) > 50:
+        if (self._lastStatus == None or self._lastStatus != v) and self._clock.ticks_diff(t, self._debounce_time) > 50:
             self._debounce_time=t
             self._lastStatus = v
-            if self._handler is not None:
-                if self.isPressed():
-                    Log.i(f'Button {self._name} pressed')
-                    self._handler.buttonPressed(self._name)
-                else:
-                    Log.i(f'Button {self._name} released')
-                    self._handler.buttonReleased(self._name)
+            if self._queue is not None:
+                # Defer everything else to the main loop - no allocation here
+                self._queue.push(self._queueId, v, t)
+            else:
+                self._dispatch(v, t)
         #self._debounce_time=t
 
+    def _dispatch(self, v, t):
+        """ Call the handler for a pin value, directly or from EventQueue.drain """
+
+        if self._handler is not None:
+            if (self._lowActive and v == 0) or (not self._lowActive and v == 1):
+                Log.i('Button %s pressed', self._name)
+                self._handler.buttonPressed(self._name)
+            else:
+                Log.i('Button %s released', self._name)
+                self._handler.buttonReleased(self._name)
+
 class Joystick(Button):
     """
     A joystick is technically more than a Button, but this is an example
@@ -105,10 +134,10 @@ class Joystick(Button):
     # Status text
     statuscodes = ['Center', 'Up', 'Down', 'Left', 'Right', 'Moving']
 
-    def __init__(self, vpin, hpin, swpin, name, *, handler=None, delta=1000):
+    def __init__(self, vpin, hpin, swpin, name, *, handler=None, delta=1000, clock=None):
         # Let the superclass handle all button functionality
-        super().__init__(swpin, name, handler=handler, lowActive=True)
-        Log.i(f'Joystick constructor: create joystick at v:{vpin}, h:{hpin}')
+        super().__init__(swpin, name, handler=handler, lowActive=True, clock=clock)
+        Log.i('Joystick constructor: create joystick at v:%s, h:%s', vpin, hpin)
 
         # H and V axis pins must be standard ADC supporting
         if vpin <26 or vpin > 28 or hpin < 26 or hpin > 28:
@@ -179,13 +208,13 @@ if __name__ == "__main__":
 
     # Run until interrupted
     joystickstatus = joystick.getStatus()
-    Log.i(f"Joystick initial status: {joystick.getStatus()}")
+    Log.i("Joystick initial status: %s", joystick.getStatus())
     try:
         while True:
             print(f"Joystick data: {joystick.getData()}")
             newstatus = joystick.getStatus()
             if newstatus != joystickstatus:
-                Log.i(f"Joystick status changed from {joystickstatus} to {newstatus}")
+                Log.i("Joystick status changed from %s to %s", joystickstatus, newstatus)
                 joystickstatus = newstatus
             time.sleep(1)
     except KeyboardInterrupt:
@@ -6,31 +6,126 @@
 import time
 from machine import Pin, PWM
 from Log import *
+from Clock import SYSTEM_CLOCK
 
 class Buzzer:
     """
     A simple buzzer class - use it to play and pause different sounds
     ranging from fequencies 10 through 10000
     default volume is half volume - set it between 0 and 10
+    clock is used to time beeps and defaults to the system clock
+
+    beep and playMelody do not block. Notes go into a queue, the first one
+    starts playing right away, and the rest are advanced by update(). Call
+    update() from the main loop or a scheduler task (timeToNext() says when
+    it is next needed), or call startTimer() to have a hardware timer do it.
     """
+
+    # Longest queue of pending notes - extra notes are dropped
+    MAX_QUEUE = 16
     
-    def __init__(self, pin, name='Buzzer'):
+    def __init__(self, pin, name='Buzzer', clock=None):
         """
         Base class init - we don't do anything with the pin here
         """
         
         self._name = name
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._queue = []
+        self._noteEnd = None
+        self._timer = None
+        self.dropped = 0
         
     def beep(self, tone=500, duration=150):
         """
-        Beep the buzzer with the given tone for duration ms
+        Beep the buzzer with the given tone for duration ms. Returns right
+        away - the beep is queued behind any notes still playing.
         """
         
-        Log.i(f"Beeping {self._name} at {tone}hz for {duration} ms")
-        self.play(tone)
-        time.sleep(duration / 1000)
+        Log.i("Beeping %s at %shz for %s ms", self._name, tone, duration)
+        self._enqueue(tone, duration)
+
+    def playMelody(self, notes):
+        """
+        Queue a melody given as a sequence of (tone, duration ms) pairs.
+        A tone of 0 is a rest. Returns right away.
+        """
+
+        for (tone, duration) in notes:
+            self._enqueue(tone, duration)
+
+    def _enqueue(self, tone, duration):
+        if len(self._queue) >= self.MAX_QUEUE:
+            self.dropped += 1
+            return
+        self._queue.append((tone, duration))
+        if self._noteEnd is None:
+            self._nextNote(self._clock.ticks_ms())
+
+    def _nextNote(self, now):
+        if not self._queue:
+            self._noteEnd = None
+            self.stop()
+            return
+        (tone, duration) = self._queue.pop(0)
+        if tone > 0:
+            self.play(tone)
+        else:
+            self.stop()
+        self._noteEnd = self._clock.ticks_add(now, duration)
+
+    def update(self):
+        """ Advance the queue when the current note is over. Cheap to call often. """
+
+        if self._noteEnd is None:
+            return
+        now = self._clock.ticks_ms()
+        if self._clock.ticks_diff(now, self._noteEnd) >= 0:
+            self._nextNote(now)
+
+    def busy(self):
+        """ True while a note or rest is in progress """
+
+        return self._noteEnd is not None
+
+    def timeToNext(self):
+        """ ms until update() has work to do, -1 if nothing is playing """
+
+        if self._noteEnd is None:
+            return -1
+        due = self._clock.ticks_diff(self._noteEnd, self._clock.ticks_ms())
+        return due if due > 0 else 0
+
+    def cancel(self):
+        """ Drop all queued notes and silence the buzzer """
+
+        self._queue = []
+        self._noteEnd = None
         self.stop()
 
+    def startTimer(self, period=10, timerid=-1):
+        """
+        Advance the queue from a periodic machine.Timer every period ms,
+        for programs that do not call update() themselves.
+        """
+
+        from machine import Timer
+        import micropython
+        self.stopTimer()
+        # bound once here so the timer callback does not allocate
+        self._scheduledUpdate = self._update_cb
+        self._timer = Timer(timerid)
+        self._timer.init(mode=Timer.PERIODIC, period=period,
+                         callback=lambda t: micropython.schedule(self._scheduledUpdate, 0))
+
+    def stopTimer(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _update_cb(self, arg):
+        self.update()
+
     def play(self, tone=500):
         """ Stub for playing a tone - implemented in subclasses """
         pass
@@ -45,20 +140,20 @@ class ActiveBuzzer(Buzzer):
     Cannot control the tone. Only turn on and off.
     """
     
-    def __init__(self, pin, name='Buzzer'):
-        super().__init__(pin, name)
+    def __init__(self, pin, name='Buzzer', clock=None):
+        super().__init__(pin, name, clock)
         self._buz = Pin(pin, Pin.OUT)
    
     def play(self, tone=500):
         """ Play sound. Tone is ignored. """
         
-        Log.i(f"Start playing {self._name}")
+        Log.i("Start playing %s", self._name)
         self._buz.value(1)
         
     def stop(self):
         """ Stop the sound. """
         
-        Log.i(f"Stop playing {self._name}")
+        Log.i("Stop playing %s", self._name)
         self._buz.value(0)
     
 class PassiveBuzzer(Buzzer):
@@ -69,9 +164,9 @@ class PassiveBuzzer(Buzzer):
     """
     MAX = 32767  # Max value for duty cycle
     
-    def __init__(self, pin, name='Buzzer'):
+    def __init__(self, pin, name='Buzzer', clock=None):
         Log.i("PassiveBuzzer: constructor")
-        super().__init__(pin, name)
+        super().__init__(pin, name, clock)
         self._buz = PWM(Pin(pin))
         self._volume = 0.5  # Default volume is half
         self._playing = False
@@ -80,7 +175,7 @@ class PassiveBuzzer(Buzzer):
     def play(self, tone=500):
         """ play the supplied tone. """
         
-        Log.i(f"{self._name}: playing tone {tone}")
+        Log.i("%s: playing tone %s", self._name, tone)
         self._buz.freq(tone)
         self._buz.duty_u16(int(self._volume * self.MAX))
         self._playing = True
@@ -88,7 +183,7 @@ class PassiveBuzzer(Buzzer):
     def stop(self):
         """ Stop playing sound """
         
-        Log.i(f"{self._name}: stopping tone")
+        Log.i("%s: stopping tone", self._name)
         self._buz.duty_u16(0)
         self._playing = False
 
@@ -103,7 +198,7 @@ class PassiveBuzzer(Buzzer):
         set to max.
         """
         
-        Log.i(f"{self._name}: changing volume to {volume}")
+        Log.i("%s: changing volume to %s", self._name, volume)
         self._volume = volume
         if (self._playing):
             self._buz.duty_u16(int(self._volume * self.MAX))
@@ -286,4 +381,11 @@ if __name__ == "__main__":
         buzzer.play(note)
         time.sleep(0.5)
 
-    buzzer.stop()
\ No newline at end of file
+    buzzer.stop()
+
+    # The same scale through the non-blocking sequencer
+    Log.i("Playing Do Re Mi without blocking")
+    buzzer.playMelody([(note, 500) for note in [DO, RE, MI, FA, SO, LA, TI, DO2]])
+    while buzzer.busy():
+        buzzer.update()
+        time.sleep_ms(10)
\ No newline at end of file
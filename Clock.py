@@ -0,0 +1,107 @@
+"""
+# Clock.py
+# Injectable time sources - the real system clock, or a virtual clock
+# that only moves when told to, for fast simulation on a host machine
+"""
+
+import time
+
+
+class SystemClock:
+    """
+    The real clock. Uses the MicroPython ticks functions, and falls back
+    to time.monotonic on CPython where those do not exist.
+    """
+
+    if hasattr(time, "ticks_ms"):
+        def ticks_ms(self):
+            return time.ticks_ms()
+
+        def ticks_us(self):
+            return time.ticks_us()
+
+        def ticks_diff(self, a, b):
+            return time.ticks_diff(a, b)
+
+        def ticks_add(self, a, b):
+            return time.ticks_add(a, b)
+
+        def sleep_ms(self, ms):
+            time.sleep_ms(ms)
+
+        def sleep_us(self, us):
+            time.sleep_us(us)
+    else:
+        def ticks_ms(self):
+            return int(time.monotonic() * 1000)
+
+        def ticks_us(self):
+            return int(time.monotonic() * 1000000)
+
+        def ticks_diff(self, a, b):
+            return a - b
+
+        def ticks_add(self, a, b):
+            return a + b
+
+        def sleep_ms(self, ms):
+            time.sleep(ms / 1000)
+
+        def sleep_us(self, us):
+            time.sleep(us / 1000000)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def time(self):
+        """ Wall-clock seconds from the RTC, for timestamps that survive a reset """
+        return int(time.time())
+
+
+class VirtualClock:
+    """
+    A clock whose time only moves when advanced. Every sleep returns
+    immediately after moving the time forward by the requested amount,
+    so a simulation can jump straight from one deadline to the next.
+    Ticks never wrap, so ticks_diff is plain subtraction.
+    """
+
+    def __init__(self, start_ms=0, epoch=0):
+        self._us = start_ms * 1000
+        # wall-clock seconds when ticks_ms() is 0, see time()
+        self._epoch = epoch
+
+    def ticks_ms(self):
+        return self._us // 1000
+
+    def ticks_us(self):
+        return self._us
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+    def ticks_add(self, a, b):
+        return a + b
+
+    def advance(self, ms):
+        """ Move the clock forward by ms milliseconds """
+
+        if ms > 0:
+            self._us += int(ms * 1000)
+
+    def sleep_ms(self, ms):
+        self.advance(ms)
+
+    def sleep_us(self, us):
+        if us > 0:
+            self._us += int(us)
+
+    def sleep(self, seconds):
+        self.advance(seconds * 1000)
+
+    def time(self):
+        return self._epoch + self._us // 1000000
+
+
+# Shared default for classes that are not given a clock
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,108 @@
+"""
+# Compositor.py
+# A small layer compositor for framebuffer displays such as the SSD1306
+"""
+
+
+class Layer:
+    """
+    A rectangular region of the screen drawn by a render callback.
+
+    key() returns a value that describes what the layer currently shows
+    (a sprite, a string, a tuple of stats...). The layer is marked dirty and
+    re-rendered only when that value changes, so the key must be cheap to
+    compute and must cover everything render() draws. A key of None means
+    the layer is currently empty and draws nothing.
+
+    render(layer) draws the layer into the display. The compositor has already
+    cleared the layer's rectangle, so render only needs to draw lit pixels.
+    """
+
+    def __init__(self, name, x, y, w, h, render, key):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.render = render
+        self.key = key
+        self.dirty = True
+        self._lastKey = None
+
+    def overlaps(self, other):
+        """ True if the two layer rectangles intersect """
+
+        return (self.x < other.x + other.w and other.x < self.x + self.w
+                and self.y < other.y + other.h and other.y < self.y + self.h)
+
+
+class Compositor:
+    """
+    Keeps an ordered list of layers (first added is at the bottom) and merges
+    the dirty ones into the display framebuffer.
+
+    When a layer is dirty its rectangle is cleared, which also wipes anything
+    below or above it in that area, so every non-empty layer that overlaps a
+    dirty layer is redrawn as well. Layers that do not change are never touched, and
+    show() is only called when at least one layer was redrawn.
+    """
+
+    def __init__(self, display):
+        self._d = display
+        self._layers = []
+        self.renders = 0
+        self.updates = 0
+
+    def addLayer(self, layer):
+        """ Add a layer on top of the existing ones, returns the layer """
+
+        self._layers.append(layer)
+        return layer
+
+    def invalidate(self):
+        """ Force every layer to be redrawn on the next update """
+
+        for layer in self._layers:
+            layer.dirty = True
+
+    def update(self):
+        """
+        Re-render the dirty layers and flush the display.
+        Returns True if anything was drawn.
+        """
+
+        layers = self._layers
+        changed = False
+        for layer in layers:
+            k = layer.key()
+            if k != layer._lastKey:
+                layer._lastKey = k
+                layer.dirty = True
+            if layer.dirty:
+                changed = True
+        if not changed:
+            return False
+
+        # Spread dirtiness to overlapping layers until nothing new is marked
+        spreading = True
+        while spreading:
+            spreading = False
+            for a in layers:
+                if a.dirty:
+                    for b in layers:
+                        if not b.dirty and b._lastKey is not None and a.overlaps(b):
+                            b.dirty = True
+                            spreading = True
+
+        d = self._d
+        for layer in layers:
+            if layer.dirty:
+                d.fill_rect(layer.x, layer.y, layer.w, layer.h, 0)
+        for layer in layers:
+            if layer.dirty:
+                layer.render(layer)
+                layer.dirty = False
+                self.renders += 1
+        self.updates += 1
+        d.show()
+        return True
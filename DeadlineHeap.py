@@ -0,0 +1,73 @@
+"""
+# DeadlineHeap.py
+# A min-heap of millisecond deadlines shared by the animation engine and
+# the software timers
+"""
+
+import heapq
+from Clock import SYSTEM_CLOCK
+
+
+class DeadlineHeap:
+    """
+    Objects waiting for a deadline, earliest first. Checking for due
+    objects costs one comparison when none are, however many are waiting.
+
+    Deadlines are kept on an internal millisecond counter built up with
+    ticks_diff, so the heap order survives ticks_ms() wrapping around; use
+    time() to read that counter and add delays to it.
+
+    Objects must have a _gen counter. An entry is only live while the
+    object's _gen is unchanged since push(), so bumping _gen cancels
+    every entry of the object without searching the heap; stale entries
+    are dropped when they reach the top.
+    """
+
+    def __init__(self, clock=None):
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._heap = []
+        self._seq = 0
+        self._elapsed = 0
+        self._last = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def time(self, now=None):
+        """ The heap's unwrapped ms counter at ticks_ms() now (default: the clock's) """
+
+        if now is None:
+            now = self._clock.ticks_ms()
+        if self._last is None:
+            self._last = now
+        else:
+            self._elapsed += self._clock.ticks_diff(now, self._last)
+            self._last = now
+        return self._elapsed
+
+    def push(self, obj, deadline):
+        """ Queue obj for deadline, on the time() counter """
+
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, obj._gen, obj))
+
+    def nextDeadline(self):
+        """ The earliest live deadline, None if nothing is waiting """
+
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            if entry[2] == entry[3]._gen:
+                return entry[0]
+            heapq.heappop(heap)
+        return None
+
+    def pop(self, t):
+        """ Remove and return the earliest live (deadline, seq, gen, obj) entry due by t, None if none is """
+
+        heap = self._heap
+        while heap and heap[0][0] <= t:
+            entry = heapq.heappop(heap)
+            if entry[2] == entry[3]._gen:
+                return entry
+        return None
@@ -0,0 +1,117 @@
+"""
+# EventQueue.py
+# A pre-allocated ring buffer that moves input events out of interrupt context
+"""
+
+from array import array
+
+
+class EventQueue:
+    """
+    A fixed-size ring buffer of (source id, edge, timestamp) records.
+
+    push() is meant to be called from an interrupt handler. It only stores
+    small integers into arrays allocated up front, so it never allocates
+    and never calls into game code. The main loop calls drain(), which hands
+    the queued records back to their sources in one batch, outside of the
+    interrupt, where they can safely print, beep and start animations.
+
+    Sources (Buttons, DigitalSensors) call register(self) to get their id and
+    must implement _dispatch(edge, timestamp).
+
+    One slot is always kept free, so the queue holds size - 1 records.
+    When it is full new records are dropped; dropped counts every lost
+    record, overflows counts how many times the queue filled up, and peak
+    is the most records ever waiting at once. Use them to size the queue.
+
+    setFlag() takes a flag with an IRQ-safe set(), such as a uasyncio
+    ThreadSafeFlag. push() sets it, so a task can wait on the flag and only
+    wake up when there is something to drain.
+    """
+
+    def __init__(self, size=32):
+        self._size = size
+        self._src = array('B', [0] * size)
+        self._edge = array('B', [0] * size)
+        self._time = array('l', [0] * size)
+        self._head = 0
+        self._tail = 0
+        self._sources = []
+        self._overflowing = False
+        self.dropped = 0
+        self.overflows = 0
+        self.peak = 0
+        self._flag = None
+        # timestamp of the record being dispatched, None outside drain()
+        self.eventTime = None
+
+    def register(self, source):
+        """ Register an event source, returns its id """
+
+        if len(self._sources) >= 256:
+            raise ValueError("Too many event sources")
+        self._sources.append(source)
+        return len(self._sources) - 1
+
+    def setFlag(self, flag):
+        """ Set flag on every push, None to stop """
+
+        self._flag = flag
+
+    def push(self, src, edge, t):
+        """ Queue one record - IRQ safe. Returns False if it was dropped. """
+
+        head = self._head
+        nxt = head + 1
+        if nxt == self._size:
+            nxt = 0
+        if nxt == self._tail:
+            self.dropped += 1
+            if not self._overflowing:
+                self._overflowing = True
+                self.overflows += 1
+            return False
+        self._src[head] = src
+        self._edge[head] = edge
+        self._time[head] = t
+        self._head = nxt
+        count = nxt - self._tail
+        if count < 0:
+            count += self._size
+        if count > self.peak:
+            self.peak = count
+        if self._flag is not None:
+            self._flag.set()
+        return True
+
+    def pending(self):
+        """ Number of records waiting to be drained """
+
+        count = self._head - self._tail
+        if count < 0:
+            count += self._size
+        return count
+
+    def drain(self):
+        """
+        Dispatch every queued record to its source, returns how many
+        were handled. Call from the main loop, never from an IRQ.
+        """
+
+        n = 0
+        sources = self._sources
+        while self._tail != self._head:
+            tail = self._tail
+            src = self._src[tail]
+            edge = self._edge[tail]
+            t = self._time[tail]
+            tail += 1
+            if tail == self._size:
+                tail = 0
+            self._tail = tail
+            self.eventTime = t
+            sources[src]._dispatch(edge, t)
+            n += 1
+        self.eventTime = None
+        self._overflowing = False
+        return n
@@ -1,16 +1,99 @@
+"""
+# Log.py
+# Leveled logging that only formats a message when its level is enabled
+#
+# Pass a %-style format string and up to four arguments instead of an
+# f-string, e.g. Log.i('Button %s pressed', name). A call below _LEVEL
+# returns straight away without formatting or allocating anything, so
+# it is safe to leave log calls in hot paths.
+"""
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+_DEBUG = const(0)
+_INFO = const(1)
+_WARN = const(2)
+_ERROR = const(3)
+_OFF = const(4)
+
+# The log level, fixed at compile time. Set it to _DEBUG, _INFO, _WARN or
+# _ERROR to enable messages at that level and above.
+_LEVEL = const(_OFF)
+
+# Marks arguments that were not passed, so calls need no *args tuple
+_NA = object()
+
+
 class Log:
+    # Print enabled messages to the console
+    echo = True
+    # Optional in-RAM ring buffer of the last messages, see Log.ring()
+    _ring = None
+    _ringPos = 0
+
     @staticmethod
-    def d(msg):
-        pass
+    def d(msg, a=_NA, b=_NA, c=_NA, d=_NA):
+        if _LEVEL > _DEBUG:
+            return
+        Log._emit('D', msg, a, b, c, d)
 
     @staticmethod
-    def i(msg):
-        pass
+    def i(msg, a=_NA, b=_NA, c=_NA, d=_NA):
+        if _LEVEL > _INFO:
+            return
+        Log._emit('I', msg, a, b, c, d)
 
     @staticmethod
-    def w(msg):
-        pass
+    def w(msg, a=_NA, b=_NA, c=_NA, d=_NA):
+        if _LEVEL > _WARN:
+            return
+        Log._emit('W', msg, a, b, c, d)
 
     @staticmethod
-    def e(msg):
-        pass
+    def e(msg, a=_NA, b=_NA, c=_NA, d=_NA):
+        if _LEVEL > _ERROR:
+            return
+        Log._emit('E', msg, a, b, c, d)
+
+    @staticmethod
+    def _emit(level, msg, a, b, c, d):
+        if a is not _NA:
+            if b is _NA:
+                msg = msg % (a,)
+            elif c is _NA:
+                msg = msg % (a, b)
+            elif d is _NA:
+                msg = msg % (a, b, c)
+            else:
+                msg = msg % (a, b, c, d)
+        line = level + ': ' + msg
+        if Log.echo:
+            print(line)
+        ring = Log._ring
+        if ring is not None:
+            ring[Log._ringPos] = line
+            Log._ringPos = (Log._ringPos + 1) % len(ring)
+
+    @staticmethod
+    def ring(size=32):
+        """
+        Keep the last size enabled messages in RAM for a post-mortem dump.
+        Pass 0 to turn the ring buffer off.
+        """
+
+        Log._ring = [None] * size if size > 0 else None
+        Log._ringPos = 0
+
+    @staticmethod
+    def dump():
+        """ Return the messages in the ring buffer, oldest first """
+
+        ring = Log._ring
+        if ring is None:
+            return []
+        pos = Log._ringPos
+        return [line for line in ring[pos:] + ring[:pos] if line is not None]
@@ -0,0 +1,315 @@
+"""
+# MPU6050.py
+# I2C driver for the MPU6050 accelerometer/gyro, with single reads for
+# polling and a FIFO streaming mode that drains many samples per burst read
+"""
+
+import math
+from array import array
+from machine import Pin, I2C
+from Log import *
+from Clock import SYSTEM_CLOCK
+
+ADDRESS = 0x68
+
+_SMPLRT_DIV = 0x19
+_CONFIG = 0x1A
+_GYRO_CONFIG = 0x1B
+_ACCEL_CONFIG = 0x1C
+_FIFO_EN = 0x23
+_INT_STATUS = 0x3A
+_ACCEL_XOUT_H = 0x3B
+_USER_CTRL = 0x6A
+_PWR_MGMT_1 = 0x6B
+_FIFO_COUNTH = 0x72
+_FIFO_R_W = 0x74
+
+_FIFO_OFLOW = 0x10
+_FIFO_ACCEL_GYRO = 0x78     # XG, YG, ZG and ACCEL into the FIFO
+_USER_FIFO_EN = 0x40
+_USER_FIFO_RESET = 0x04
+
+FIFO_SIZE = 1024
+# accel x, y, z then gyro x, y, z, big-endian int16 each
+SAMPLE_SIZE = 12
+
+ACCEL_SCALE = 16384.0       # LSB per g at +-2 g
+GYRO_SCALE = 131.0          # LSB per deg/s at +-250 deg/s
+
+
+class MPU6050:
+    """
+    An MPU6050 on I2C. Pass an I2C object as i2c, or bus/sda/scl to have one
+    made. ofs are the calibration offsets in raw counts (accel x, y, z, gyro
+    x, y, z); without them the sensor is calibrated on creation, so it
+    should lie flat and still. The offsets are logged so they can be passed
+    in next time.
+
+    data, celsius and angles read the current values one at a time. For
+    motion at hundreds of Hz use the FIFO instead: startStream(rate) has the
+    sensor buffer samples itself, and each readFifo() drains what has
+    arrived in one burst read into a pre-allocated bytearray and decodes it
+    into the array columns ax, ay, az, gx, gy, gz (raw counts with the
+    offsets removed; divide by ACCEL_SCALE or GYRO_SCALE for g and deg/s).
+    The sample buffers are allocated once, up front.
+    """
+
+    def __init__(self, bus=0, sda=0, scl=1, ofs=None, i2c=None, addr=ADDRESS, capacity=FIFO_SIZE // SAMPLE_SIZE,
+                 clock=None):
+        self._i2c = i2c if i2c is not None else I2C(bus, sda=Pin(sda), scl=Pin(scl), freq=400000)
+        self._addr = addr
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._reg = bytearray(1)
+        self._word = bytearray(2)
+        self._raw = bytearray(14)
+        self._capacity = capacity
+        self._fifo = bytearray(capacity * SAMPLE_SIZE)
+        self._fifoView = memoryview(self._fifo)
+        self.ax = array('l', [0] * capacity)
+        self.ay = array('l', [0] * capacity)
+        self.az = array('l', [0] * capacity)
+        self.gx = array('l', [0] * capacity)
+        self.gy = array('l', [0] * capacity)
+        self.gz = array('l', [0] * capacity)
+        self.count = 0
+        self.overflows = 0
+        self.streaming = False
+
+        self._write(_PWR_MGMT_1, 0x01)      # wake up, clock from gyro X PLL
+        self._write(_CONFIG, 0x01)          # 184 Hz DLPF, 1 kHz internal rate
+        self._write(_GYRO_CONFIG, 0x00)
+        self._write(_ACCEL_CONFIG, 0x00)
+        if ofs is None:
+            self.calibrate()
+        else:
+            self.ofs = tuple(ofs)
+
+    def _write(self, reg, value):
+        self._reg[0] = value
+        self._i2c.writeto_mem(self._addr, reg, self._reg)
+
+    def _readWord(self, reg):
+        self._i2c.readfrom_mem_into(self._addr, reg, self._word)
+        return (self._word[0] << 8) | self._word[1]
+
+    def _readRaw(self):
+        """ Read accel, temperature and gyro in one transfer, returns the 7 raw int16 values """
+
+        b = self._raw
+        self._i2c.readfrom_mem_into(self._addr, _ACCEL_XOUT_H, b)
+        out = []
+        for i in range(0, 14, 2):
+            v = (b[i] << 8) | b[i + 1]
+            out.append(v - 65536 if v & 0x8000 else v)
+        return out
+
+    def calibrate(self, samples=100):
+        """ Average samples readings of a still, flat sensor into new offsets """
+
+        sums = [0] * 6
+        for _ in range(samples):
+            r = self._readRaw()
+            for i in range(3):
+                sums[i] += r[i]
+                sums[i + 3] += r[i + 4]
+            self._clock.sleep_ms(2)
+        ofs = [s // samples for s in sums]
+        ofs[2] -= int(ACCEL_SCALE)      # z should read 1 g lying flat
+        self.ofs = tuple(ofs)
+        Log.i("MPU6050 calibrated, ofs=%s", self.ofs)
+        return self.ofs
+
+    @property
+    def data(self):
+        """ (ax, ay, az) in g and (gx, gy, gz) in deg/s as one 6-tuple """
+
+        r = self._readRaw()
+        o = self.ofs
+        return ((r[0] - o[0]) / ACCEL_SCALE, (r[1] - o[1]) / ACCEL_SCALE, (r[2] - o[2]) / ACCEL_SCALE,
+                (r[4] - o[3]) / GYRO_SCALE, (r[5] - o[4]) / GYRO_SCALE, (r[6] - o[5]) / GYRO_SCALE)
+
+    @property
+    def celsius(self):
+        v = self._readWord(0x41)
+        if v & 0x8000:
+            v -= 65536
+        return v / 340 + 36.53
+
+    @property
+    def fahrenheit(self):
+        return self.celsius * 9 / 5 + 32
+
+    @property
+    def angles(self):
+        """ (pitch, roll) in degrees from the accelerometer """
+
+        ax, ay, az = self.data[:3]
+        pitch = math.degrees(math.atan2(-ax, math.sqrt(ay * ay + az * az)))
+        roll = math.degrees(math.atan2(ay, az))
+        return (pitch, roll)
+
+    # ======= FIFO streaming =======
+
+    def startStream(self, rate=200):
+        """ Buffer accel and gyro samples in the sensor FIFO at rate Hz (4..1000) """
+
+        div = max(0, min(255, 1000 // rate - 1))
+        self._write(_SMPLRT_DIV, div)
+        self._write(_FIFO_EN, 0)
+        self._write(_USER_CTRL, _USER_FIFO_RESET)
+        self._write(_FIFO_EN, _FIFO_ACCEL_GYRO)
+        self._write(_USER_CTRL, _USER_FIFO_EN)
+        self.count = 0
+        self.streaming = True
+        Log.i("MPU6050 streaming at %s Hz", 1000 // (div + 1))
+
+    def stopStream(self):
+        self._write(_FIFO_EN, 0)
+        self._write(_USER_CTRL, 0)
+        self.count = 0
+        self.streaming = False
+
+    def _resetFifo(self):
+        self._write(_USER_CTRL, _USER_FIFO_RESET | _USER_FIFO_EN)
+
+    def readFifo(self, maxSamples=0):
+        """
+        Drain up to maxSamples (default: capacity) whole samples from the
+        FIFO in one burst read and decode them into the columns. Returns the
+        number of samples, also kept in count. If the FIFO overflowed its
+        contents are no longer aligned to samples, so it is reset, counted
+        in overflows and 0 is returned; call readFifo() more often than
+        FIFO_SIZE / (SAMPLE_SIZE * rate) seconds to avoid that.
+        """
+
+        self.count = 0
+        if not self.streaming:
+            return 0
+        self._i2c.readfrom_mem_into(self._addr, _INT_STATUS, self._reg)
+        if self._reg[0] & _FIFO_OFLOW:
+            self._resetFifo()
+            self.overflows += 1
+            Log.w("MPU6050 FIFO overflow")
+            return 0
+        n = self._readWord(_FIFO_COUNTH) // SAMPLE_SIZE
+        limit = maxSamples if 0 < maxSamples < self._capacity else self._capacity
+        if n > limit:
+            n = limit
+        if n == 0:
+            return 0
+        self._i2c.readfrom_mem_into(self._addr, _FIFO_R_W, self._fifoView[:n * SAMPLE_SIZE])
+        self._decode(n)
+        self.count = n
+        return n
+
+    def _decode(self, n):
+        b = self._fifo
+        o = self.ofs
+        cols = (self.ax, self.ay, self.az, self.gx, self.gy, self.gz)
+        for c in range(6):
+            col = cols[c]
+            ofs = o[c]
+            i = c * 2
+            for k in range(n):
+                v = (b[i] << 8) | b[i + 1]
+                col[k] = (v - 65536 if v & 0x8000 else v) - ofs
+                i += SAMPLE_SIZE
+
+    def outsideG(self, g=0.5):
+        """
+        How many samples of the last readFifo() had an acceleration
+        magnitude below 1 - g or above 1 + g (in g). The magnitude is
+        compared squared on counts shifted down to 1024 per g, so the sums
+        stay small ints on the Pico.
+        """
+
+        lo = int((1 - g) * 1024) if g < 1 else 0
+        hi = int((1 + g) * 1024)
+        lo *= lo
+        hi *= hi
+        ax = self.ax
+        ay = self.ay
+        az = self.az
+        n = 0
+        for k in range(self.count):
+            x = ax[k] >> 4
+            y = ay[k] >> 4
+            z = az[k] >> 4
+            m = x * x + y * y + z * z
+            if m < lo or m > hi:
+                n += 1
+        return n
+
+
+if __name__ == "__main__":
+    import struct
+    from Clock import VirtualClock
+
+    class FakeI2C:
+        """ An MPU6050 register file that fills its FIFO from a synthetic motion signal """
+
+        def __init__(self, clock):
+            self.clock = clock
+            self.regs = bytearray(128)
+            self.fifo = bytearray()
+            self.last = clock.ticks_ms()
+            self.t = 0
+            self.bursts = 0
+
+        def _sample(self):
+            self.t += 1
+            shake = 12000 if (self.t // 50) % 2 else 0
+            return (100, -50, 16384 + 30 + (shake if self.t % 2 else -shake), 7, -3, 2)
+
+        def _fill(self):
+            now = self.clock.ticks_ms()
+            regs = self.regs
+            period = regs[_SMPLRT_DIV] + 1
+            while self.clock.ticks_diff(now, self.last) >= period:
+                self.last += period
+                if regs[_FIFO_EN] == _FIFO_ACCEL_GYRO and regs[_USER_CTRL] & _USER_FIFO_EN:
+                    if len(self.fifo) + SAMPLE_SIZE > FIFO_SIZE:
+                        regs[_INT_STATUS] |= _FIFO_OFLOW
+                    else:
+                        self.fifo += struct.pack('>6h', *self._sample())
+
+        def writeto_mem(self, addr, reg, buf):
+            self.regs[reg] = buf[0]
+            if reg == _USER_CTRL and buf[0] & _USER_FIFO_RESET:
+                self.fifo = bytearray()
+                self.regs[_INT_STATUS] &= ~_FIFO_OFLOW
+                self.regs[reg] &= ~_USER_FIFO_RESET
+
+        def readfrom_mem_into(self, addr, reg, buf):
+            self._fill()
+            n = len(buf)
+            if reg == _FIFO_R_W:
+                self.bursts += 1
+                buf[:] = self.fifo[:n]
+                del self.fifo[:n]
+            elif reg == _FIFO_COUNTH:
+                struct.pack_into('>H', buf, 0, len(self.fifo))
+            elif reg == _INT_STATUS:
+                buf[0] = self.regs[_INT_STATUS]
+                self.regs[_INT_STATUS] &= ~_FIFO_OFLOW
+            elif reg == _ACCEL_XOUT_H:
+                s = self._sample()
+                struct.pack_into('>7h', buf, 0, s[0], s[1], s[2], 1000, s[3], s[4], s[5])
+            else:
+                buf[:] = self.regs[reg:reg + n]
+
+    clock = VirtualClock()
+    i2c = FakeI2C(clock)
+    mpu = MPU6050(i2c=i2c, clock=clock)
+    print(f"Offsets: {mpu.ofs}, {mpu.celsius:.2f} C")
+    mpu.startStream(rate=500)
+    total = 0
+    for frame in range(100):
+        clock.advance(30)
+        n = mpu.readFifo()
+        total += n
+        if frame % 10 == 0:
+            print(f"{clock.ticks_ms()} ms: {n} samples, az[0]={mpu.az[0]}, outside 0.5 g: {mpu.outsideG(0.5)}")
+    print(f"{total} samples in {i2c.bursts} burst reads, {mpu.overflows} overflows")
+    clock.advance(1000)
+    print(f"After a 1 s stall: {mpu.readFifo()} samples, {mpu.overflows} overflows, then {clock.advance(30) or mpu.readFifo()}")
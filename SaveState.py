@@ -0,0 +1,180 @@
+"""
+# SaveState.py
+# Keeps the pet across resets in a small fixed-size binary record on flash
+"""
+
+import struct
+from array import array
+from collections import namedtuple
+from Log import *
+from Clock import SYSTEM_CLOCK
+
+MAGIC = b'TP'
+VERSION = 1
+NAME_LEN = 12
+
+# magic, version, state, seq, time, hunger, happy, energy, dirty, anim, selected, name
+_BODY = '<2sBBII4hBB%ds' % NAME_LEN
+_BODY_SIZE = struct.calcsize(_BODY)
+# the body is followed by its CRC16
+RECORD_SIZE = _BODY_SIZE + 2
+
+SaveRecord = namedtuple('SaveRecord', ('seq', 'time', 'name', 'hunger', 'happy', 'energy',
+                                       'dirty', 'state', 'anim', 'selected'))
+
+
+def _crcTable():
+    table = array('H', [0] * 256)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table[i] = crc & 0xFFFF
+    return table
+
+_CRC_TABLE = _crcTable()
+
+
+def crc16(buf, start=0, end=None):
+    """ CRC-16/CCITT-FALSE of buf[start:end] """
+
+    table = _CRC_TABLE
+    crc = 0xFFFF
+    for i in range(start, len(buf) if end is None else end):
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ buf[i]]
+    return crc
+
+
+class SaveState:
+    """
+    Saves the pet in one of several fixed-size slots of a single file.
+
+    Each write goes to the slot after the last one written, with a sequence
+    number one higher, and every record carries a magic, a version and a
+    CRC16. A slot that was only half written when the power went away is
+    simply ignored on load and the previous record is used instead. The
+    slots do not spread flash wear: the whole file sits in one erase block,
+    which LittleFS rewrites on every write anyway.
+
+    Wear is kept down by writing rarely: save() writes a change of name,
+    state or animation straight away, while stat changes (every pet tick)
+    are written at most every min_interval seconds. Nothing is written if
+    nothing changed.
+
+    Timestamps come from clock.time() (seconds). On a board whose RTC does
+    not keep time across resets the offline catch-up simply does nothing.
+    """
+
+    def __init__(self, path='tama.sav', slots=4, min_interval=60, clock=None):
+        self._path = path
+        self._slots = slots
+        self._minInterval = min_interval * 1000
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._buf = bytearray(RECORD_SIZE)
+        self._seq = 0
+        self._slot = 0
+        self._fileOk = False
+        self._lastWrite = None
+        self._major = None
+        self._stats = None
+        self.writes = 0
+        self.skipped = 0
+
+    def load(self):
+        """
+        Read every slot in one pass and return the newest valid SaveRecord,
+        or None if there is none. Later saves continue after that slot.
+        """
+
+        try:
+            with open(self._path, 'rb') as f:
+                data = f.read(self._slots * RECORD_SIZE)
+        except OSError:
+            return None
+        self._fileOk = len(data) == self._slots * RECORD_SIZE
+
+        best = None
+        bestSlot = -1
+        for slot in range(len(data) // RECORD_SIZE):
+            off = slot * RECORD_SIZE
+            end = off + _BODY_SIZE
+            if data[off] != MAGIC[0] or data[off + 1] != MAGIC[1] or data[off + 2] != VERSION:
+                continue
+            if crc16(data, off, end) != data[end] | (data[end + 1] << 8):
+                continue
+            fields = struct.unpack_from(_BODY, data, off)
+            if best is None or fields[3] > best[3]:
+                best = fields
+                bestSlot = slot
+        if best is None:
+            Log.i('SaveState: no valid record in %s', self._path)
+            return None
+
+        (magic, version, state, seq, t, hunger, happy, energy, dirty, anim, selected, name) = best
+        self._seq = seq
+        self._slot = (bestSlot + 1) % self._slots
+        self._major = None
+        Log.i('SaveState: loaded record %s from slot %s', seq, bestSlot)
+        return SaveRecord(seq, t, name.rstrip(b'\0').decode(), hunger, happy, energy,
+                          dirty, state, anim, selected)
+
+    def save(self, name, hunger, happy, energy, dirty, state=0, anim=0, selected=0, force=False):
+        """ Save the pet if it is worth it, returns True if a record was written """
+
+        now = self._clock.ticks_ms()
+        major = (name, state, anim)
+        stats = (hunger, happy, energy, dirty, selected)
+        if not force and major == self._major:
+            if stats == self._stats:
+                self.skipped += 1
+                return False
+            if (self._lastWrite is not None
+                    and self._clock.ticks_diff(now, self._lastWrite) < self._minInterval):
+                self.skipped += 1
+                return False
+
+        self._seq += 1
+        buf = self._buf
+        struct.pack_into(_BODY, buf, 0, MAGIC, VERSION, state, self._seq, self._clock.time(),
+                         hunger, happy, energy, dirty, anim, selected, name.encode()[:NAME_LEN])
+        crc = crc16(buf, 0, _BODY_SIZE)
+        buf[_BODY_SIZE] = crc & 0xFF
+        buf[_BODY_SIZE + 1] = crc >> 8
+        self._write(self._slot, buf)
+
+        self._slot = (self._slot + 1) % self._slots
+        self._lastWrite = now
+        self._major = major
+        self._stats = stats
+        self.writes += 1
+        return True
+
+    def _write(self, slot, buf):
+        if not self._fileOk:
+            size = self._slots * RECORD_SIZE
+            try:
+                with open(self._path, 'rb') as f:
+                    ok = len(f.read(size)) == size
+            except OSError:
+                ok = False
+            if not ok:
+                # create the file with every slot empty
+                with open(self._path, 'wb') as f:
+                    f.write(bytes(size))
+            self._fileOk = True
+        with open(self._path, 'r+b') as f:
+            f.seek(slot * RECORD_SIZE)
+            f.write(buf)
+
+
+if __name__ == "__main__":
+    from Clock import VirtualClock
+
+    clock = VirtualClock()
+    s = SaveState('test.sav', slots=4, min_interval=60, clock=clock)
+    print(f"Record size: {RECORD_SIZE} bytes, loaded: {s.load()}")
+    for i in range(600):
+        s.save('Mochi', 50 - i // 20, 80, 80, i // 10)
+        clock.advance(1000)
+    print(f"600 ticks: {s.writes} writes, {s.skipped} skipped")
+    print(SaveState('test.sav', slots=4, clock=clock).load())
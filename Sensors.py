@@ -6,12 +6,13 @@
 # Author: Arijit Sengupta
 """
 
-import utime
 import math
 import dht
-from machine import Pin, ADC
+from array import array
+from machine import Pin, ADC, time_pulse_us
 from collections import namedtuple
 from Log import *
+from Clock import SYSTEM_CLOCK
 
 class Sensor:
     """
@@ -31,17 +32,26 @@ class Sensor:
     Some of the digital sensors such as flame sensors, proximity sensors
     are lowActive, while others such as PIR sensors are highActive. Please
     check the sensor documentation for the correct value.
+
+    clock: the time source used for sampling delays and polling, defaults
+    to the system clock. Pass a VirtualClock to run sensors in simulation.
     """
     
-    def __init__(self, name='Sensor', lowActive = True):
+    def __init__(self, name='Sensor', lowActive = True, clock=None):
         self._lowActive = lowActive
         self._name = name
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+
+    def setClock(self, clock):
+        """ Use clock for timestamps from now on, e.g. the game's VirtualClock """
+
+        self._clock = clock
 
     def rawValue(self):
-        Log.e(f"rawValue not implemented for {type(self).__name__} {self._name}")
+        Log.e("rawValue not implemented for %s %s", type(self).__name__, self._name)
 
     def tripped(self)->bool:
-        Log.e(f"tripped not implemented for {type(self).__name__} {self._name}")
+        Log.e("tripped not implemented for %s %s", type(self).__name__, self._name)
         return False
 
 class DigitalSensor(Sensor):
@@ -56,12 +66,18 @@ class DigitalSensor(Sensor):
     pin: the pin number to which the sensor is connected
     name: the name of the sensor
     lowActive: set to True if the sensor gets low when tripped.
+    queue: an optional EventQueue. If given, the interrupt handler only
+    queues the edge and the handler is called from queue.drain() in the
+    main loop instead of from the interrupt.
+    clock: the clock that timestamps queued edges (default SYSTEM_CLOCK)
     """
 
-    def __init__(self, pin, name='Digital Sensor', lowActive=True, handler=None):
-        super().__init__(name, lowActive)
+    def __init__(self, pin, name='Digital Sensor', lowActive=True, handler=None, queue=None, clock=None):
+        super().__init__(name, lowActive, clock)
         self._pinio = Pin(pin, Pin.IN)
         self._handler = None
+        self._queue = None
+        self.setQueue(queue)
         self.setHandler(handler)
 
     def rawValue(self):
@@ -70,7 +86,7 @@ class DigitalSensor(Sensor):
     def tripped(self)->bool:
         v = self.rawValue()
         if (self._lowActive and v == 0) or (not self._lowActive and v == 1):
-            Log.i(f"DigitalSensor {self._name}: sensor tripped")
+            Log.i("DigitalSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -90,15 +106,35 @@ class DigitalSensor(Sensor):
         if self._handler:
             self._pinio.irq(trigger = Pin.IRQ_FALLING | Pin.IRQ_RISING, handler = self._callback)
         
+    def setQueue(self, queue):
+        """
+        Route events through an EventQueue instead of calling the handler
+        from the interrupt. Pass None to go back to direct calls.
+        """
+
+        self._queue = queue
+        if queue is not None:
+            self._queueId = queue.register(self)
+
     def _callback(self, pin):
         """ The private interrupt handler - will call appropriate handlers """
         
+        v = self._pinio.value()
+        if self._queue is not None:
+            # Defer everything else to the main loop - no allocation here
+            self._queue.push(self._queueId, v, self._clock.ticks_ms())
+        else:
+            self._dispatch(v, 0)
+
+    def _dispatch(self, v, t):
+        """ Call the handler for a pin value, directly or from EventQueue.drain """
+
         if self._handler is not None:
-            if self.tripped():
-                Log.i(f'Sensor {self._name} tripped')
+            if (self._lowActive and v == 0) or (not self._lowActive and v == 1):
+                Log.i('Sensor %s tripped', self._name)
                 self._handler.sensorTripped(self._name)
             else:
-                Log.i(f'Sensor {self._name} untripped')
+                Log.i('Sensor %s untripped', self._name)
                 self._handler.sensorUntripped(self._name)
 
 class TiltSensor(DigitalSensor):
@@ -111,11 +147,14 @@ class TiltSensor(DigitalSensor):
     the pin will go high.
     """
 
-    def __init__(self, pin, name='Tilt Sensor', handler=None):
+    def __init__(self, pin, name='Tilt Sensor', handler=None, queue=None, clock=None):
         # Init - do not call the DigitalSensor init - just create the Pin.
         # Super-superclass init called to set name and lowactiv
-        Sensor.__init__(self, name, lowActive=False)
+        Sensor.__init__(self, name, lowActive=False, clock=clock)
         self._pinio = Pin(pin, Pin.IN, Pin.PULL_UP)
+        self._handler = None
+        self._queue = None
+        self.setQueue(queue)
         self.setHandler(handler)
 
     def tripped(self):
@@ -125,11 +164,13 @@ class TiltSensor(DigitalSensor):
         tripped when the value goes high, so there it is never lowActive
         """
         if self.rawValue() == 1:
-            Log.i(f"TiltSensor {self._name}: sensor tripped")
+            Log.i("TiltSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
 
+BurstData = namedtuple('BurstData', ('mean', 'min', 'max', 'median'))
+
 class AnalogSensor(Sensor):
     """
     A simple analog sensor that returns a voltage or voltage ratio output
@@ -137,8 +178,14 @@ class AnalogSensor(Sensor):
 
     Since analog sensors do not have a handler, you need to poll
     the rawValue() method to get its value. The tripped method takes
-    3 readings and takes the average. If the average is higher/lower
-    than the threshold it will return true.
+    a burst() of burstSize readings, burstPeriod microseconds apart
+    (0 = back to back), and takes the average. If the average is
+    higher/lower than the threshold it will return true.
+
+    Pass samples=N to use sampling mode instead: call sample() periodically
+    (StateModel.run does this for you) and each call reads the ADC once,
+    without sleeping, into a ring of the last N readings. tripped() then
+    compares the running average of the ring to the threshold in O(1).
     
     Most analog sensors such as LDRs and thermistors will require
     a 10K pull-up resistor to the 3.3V rail. For better results,
@@ -150,27 +197,108 @@ class AnalogSensor(Sensor):
     your application.
     """
     
-    def __init__(self, pin, name='Analog Sensor', lowActive=True, threshold = 30000):
+    def __init__(self, pin, name='Analog Sensor', lowActive=True, threshold = 30000, clock=None, samples=0,
+                 burstSize=8, burstPeriod=0):
         """ analog sensors will need to be sent a threshold value to detect trip """
         
-        super().__init__(name, lowActive)
+        super().__init__(name, lowActive, clock)
         self._pinio = ADC(pin)
         self._threshold = threshold
+        self._burstBuf = array('H', [0] * burstSize)
+        self._burstPeriod = burstPeriod
+        # sampling mode: ring of the last raw ADC readings and their sum
+        self._ring = array('H', [0] * samples) if samples > 0 else None
+        self._ringPos = 0
+        self._ringCount = 0
+        self._ringSum = 0
+
+    def sample(self):
+        """
+        Sampling mode only: read the ADC once into the ring, without
+        sleeping. Returns the raw reading.
+        """
+
+        v = self._pinio.read_u16()
+        ring = self._ring
+        pos = self._ringPos
+        if self._ringCount == len(ring):
+            self._ringSum -= ring[pos]
+        else:
+            self._ringCount += 1
+        ring[pos] = v
+        self._ringSum += v
+        pos += 1
+        self._ringPos = 0 if pos == len(ring) else pos
+        return v
+
+    def isSampling(self):
+        """ True if the sensor was created in sampling mode (samples > 0) """
+
+        return self._ring is not None
+
+    def average(self):
+        """
+        The averaged sensor value: the running average of the ring in
+        sampling mode, otherwise the mean of one burst of readings.
+        """
+
+        if self._ring is not None:
+            if self._ringCount == 0:
+                self.sample()
+            return self._convert(self._ringSum / self._ringCount)
+
+        return self._convert(self.burst().mean)
+
+    def burst(self, n=0, period_us=-1, buf=None):
+        """
+        Read the ADC n times (default: the whole burst buffer) into buf, a
+        pre-allocated array('H') (default: the sensor's own), period_us
+        apart (default: burstPeriod). Returns BurstData(mean, min, max,
+        median) of the raw readings. Mean, min and max are kept in one
+        pass; the median comes from an insertion sort of buf in place.
+        """
+
+        if buf is None:
+            buf = self._burstBuf
+        if n <= 0 or n > len(buf):
+            n = len(buf)
+        if period_us < 0:
+            period_us = self._burstPeriod
+        read = self._pinio.read_u16
+        clock = self._clock
+        total = 0
+        lo = 65535
+        hi = 0
+        for i in range(n):
+            if period_us and i:
+                clock.sleep_us(period_us)
+            v = read()
+            buf[i] = v
+            total += v
+            if v < lo:
+                lo = v
+            if v > hi:
+                hi = v
+
+        for i in range(1, n):
+            v = buf[i]
+            j = i - 1
+            while j >= 0 and buf[j] > v:
+                buf[j + 1] = buf[j]
+                j -= 1
+            buf[j + 1] = v
+        mid = n >> 1
+        median = buf[mid] if n & 1 else (buf[mid - 1] + buf[mid]) >> 1
+
+        return BurstData(total // n, lo, hi, median)
 
     def tripped(self)->bool:
         """ sensor is tripped if sensor value is higher or lower than threshold """
         
-        # Take 3 measurements after 0.1 sec to get an average
-        v1 = self.rawValue()
-        utime.sleep(0.1)
-        v2 = self.rawValue()
-        utime.sleep(0.1)
-        v3 = self.rawValue()
-        
-        v = (v1 + v2 + v3) / 3
+        v = self.average()
         
         if (self._lowActive and v < self._threshold) or (not self._lowActive and v > self._threshold):
-            Log.i(f"AnalogSensor {self._name}: sensor tripped")
+            Log.i("AnalogSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -178,6 +306,11 @@ class AnalogSensor(Sensor):
     def rawValue(self):
         return self._pinio.read_u16()
 
+    def _convert(self, adc):
+        """ Convert a raw ADC reading into the units rawValue() returns """
+
+        return adc
+
 class TemperatureSensor():
     """
     TemperatureSensor is essentially an abstract class/interface
@@ -189,7 +322,7 @@ class TemperatureSensor():
         Return the temperature in the appropriate unit. Let's only support
         degrees Celcius (C) and Fahrenheit (F).
         """
-        Log.e(f"temperature not implemented for {type(self).__name__} {self._name}")
+        Log.e("temperature not implemented for %s %s", type(self).__name__, self._name)
         
 
     def _celciusToFahrenheit(self, t):
@@ -201,9 +334,16 @@ class Thermistor(AnalogSensor, TemperatureSensor):
     Thermistor as a subclass of Analog Sensor - and it "implements" the
     TemperatureSensor interface. The rawValue is the resistance of the thermistor
     which is then converted to temperature using the Steinhart-Hart equation.
+
+    The equation is only evaluated when the thermistor is created, to build a
+    table of centi-degrees at every 256th ADC code. Each reading is then
+    converted by integer interpolation between two table entries, without
+    floating point math or math.log. centiCelsius() converts a whole
+    array('H') of ADC readings in one call.
     """
     
-    def __init__(self, pin, name='Thermistor', lowActive=False, threshold=30, Vd=3.3, Rp=10, Rt=10, beta=3950):
+    def __init__(self, pin, name='Thermistor', lowActive=False, threshold=30, Vd=3.3, Rp=10, Rt=10, beta=3950, clock=None, samples=0,
+                 burstSize=8, burstPeriod=0):
         """
         Create a new temp sensor - similar to regular analog sensor
         but now tripped will return true when temp is lower than threshold (lowActive=True)
@@ -216,42 +356,87 @@ class Thermistor(AnalogSensor, TemperatureSensor):
             Rp value of pullup resistor in K-ohms defaults to 10k
             Rt value of thermistor resistance (10k typical for 10k thermistors)
             beta - thermistor beta constant - update if different
+            samples - ring size for sampling mode, see AnalogSensor
+            burstSize, burstPeriod - readings per burst and their spacing in us, see AnalogSensor
         """
         self.vd = Vd
         self.rt = Rt
         self.rp = Rp
         self.beta = beta
-        AnalogSensor.__init__(self, pin, name, lowActive, threshold)
+        AnalogSensor.__init__(self, pin, name, lowActive, threshold, clock, samples, burstSize, burstPeriod)
+        self._buildTable()
         
     def rawValue(self):
         """
         Reture the temperature (approx) in celsius
         """
 
-        adcvalue = AnalogSensor.rawValue(self)
+        return self._adcToCelsius(AnalogSensor.rawValue(self))
+
+    def _formulaCelsius(self, adcvalue):
+        """ The beta equation itself - only used to build the table """
+
         voltage = adcvalue / 65535.0 * self.vd
         r = self.rp * voltage / (self.vd -voltage)
         tempK = (1 / (1 / (273.15+25) + (math.log(r/self.rt)) / self.beta))
         tempC = tempK - 273.15
         return tempC
+
+    def _buildTable(self):
+        # entry i holds centi-degrees at ADC code i * 256; the two ends of
+        # the range (0 and 65535) would divide by zero, so clamp them
+        table = array('l', [0] * 257)
+        for i in range(257):
+            adc = min(max(i << 8, 1), 65534)
+            table[i] = int(round(self._formulaCelsius(adc) * 100))
+        self._table = table
+
+    def _adcToCenti(self, adcvalue):
+        """ Temperature in hundredths of a degree C for a raw ADC reading """
+
+        table = self._table
+        i = adcvalue >> 8
+        a = table[i]
+        return a + (((table[i + 1] - a) * (adcvalue & 0xFF)) >> 8)
+
+    def _adcToCelsius(self, adcvalue):
+        return self._adcToCenti(adcvalue) / 100
+
+    def _convert(self, adc):
+        return self._adcToCenti(int(adc)) / 100
+
+    def centiCelsius(self, samples, out=None):
+        """
+        Convert an array('H') of raw ADC readings to hundredths of a degree C.
+        Pass out (an array('l') at least as long) to reuse it instead of
+        allocating a new one. Returns out.
+        """
+
+        n = len(samples)
+        if out is None:
+            out = array('l', [0] * n)
+        table = self._table
+        for j in range(n):
+            v = samples[j]
+            i = v >> 8
+            a = table[i]
+            out[j] = a + (((table[i + 1] - a) * (v & 0xFF)) >> 8)
+        return out
     
     def temperature(self, unit='C'):
-        """ Return the measured temperature averaged from 3 readings """
-        # Take 3 measurements after 0.1 sec to get an average
-        v1 = self.rawValue()
-        utime.sleep(0.1)
-        v2 = self.rawValue()
-        utime.sleep(0.1)
-        v3 = self.rawValue()
-        
-        v = (v1 + v2 + v3) / 3
+        """
+        Return the measured temperature averaged from one burst of readings,
+        or from the sample ring in sampling mode
+        """
+
+        v = self.average()
         
         if unit == 'C':
             return v
         elif unit == 'F':
             return self._celciusToFahrenheit(v)
         else:
-            Log.e(f"Unknown unit {unit} for temperature")
+            Log.e("Unknown unit %s for temperature", unit)
             return None  
         
 class UltrasonicSensor(Sensor):
@@ -269,40 +454,150 @@ class UltrasonicSensor(Sensor):
     init by sending trigger, echo and optionally lowActive and threshold
     parameters. Threshold defaults to 10cm, and lowActive defaults to true
     so when distance is < 10cm, it will return true for tripped.
+
+    distance() times the echo with machine.time_pulse_us and gives up after
+    timeout_us (30 ms is about 5 m), returning None when no echo came back.
+
+    With irq=True nothing blocks: start() sends a ping, the echo pin's
+    interrupt timestamps both edges, and collect() picks the reading up
+    later. update() does both, so calling it from the loop keeps one ping
+    in flight; tripped() calls it for you.
+
+    Every reading also goes into a ring of the last filterSize echo times,
+    and median() returns the median distance over that ring. A ping with
+    no echo goes in as an out-of-range time, so once most of the recent
+    pings timed out median() returns None, as distance() does, instead of
+    repeating the last echoes.
     """
 
-    def __init__(self, *, trigger=0, echo=1, name='Ultrasonic', lowActive = True, threshold=10.0):
-        super().__init__(name, lowActive)
+    def __init__(self, *, trigger=0, echo=1, name='Ultrasonic', lowActive = True, threshold=10.0, clock=None,
+                 timeout_us=30000, filterSize=5, irq=False):
+        super().__init__(name, lowActive, clock)
         self._trigger = Pin(trigger, Pin.OUT)
         self._echo = Pin(echo, Pin.IN, Pin.PULL_DOWN)
         self._threshold = threshold
+        self._timeout = timeout_us
+        # median filter over the last echo times, in us
+        self._echoRing = array('l', [0] * filterSize)
+        self._sorted = array('l', [0] * filterSize)
+        self._echoPos = 0
+        self._echoCount = 0
+        # irq mode state, written by the echo interrupt
+        self._irq = irq
+        self._started = None
+        self._rise = 0
+        self._pulse = -1
+        self.timeouts = 0
+        if irq:
+            self._echo.irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, handler=self._echoIrq)
 
     def rawValue(self):
         """ Return the distance in cm """
         return self.distance()
-    
-    def distance(self)->float:
-        """ Get the distance of obstacle from the sensor in cm """
-        
+
+    def _ping(self):
+        clock = self._clock
         self._trigger.off()
-        utime.sleep_us(2)
+        clock.sleep_us(2)
         self._trigger.on()
-        utime.sleep_us(5)
+        clock.sleep_us(5)
         self._trigger.off()
-        while self._echo.value() == 0:
-            signaloff = utime.ticks_us()
-        while self._echo.value() == 1:
-            signalon = utime.ticks_us()
-        timepassed = signalon - signaloff
-        distance = (timepassed * 0.0343) / 2
-        return distance
+
+    def _record(self, us):
+        self._echoRing[self._echoPos] = us
+        self._echoPos = (self._echoPos + 1) % len(self._echoRing)
+        if self._echoCount < len(self._echoRing):
+            self._echoCount += 1
+        return (us * 0.0343) / 2
+
+    def _recordTimeout(self):
+        self.timeouts += 1
+        self._record(2 * self._timeout)
+    
+    def distance(self):
+        """ Get the distance of obstacle from the sensor in cm, None on timeout """
+        
+        self._ping()
+        us = time_pulse_us(self._echo, 1, self._timeout)
+        if us < 0:
+            self._recordTimeout()
+            Log.w("UltrasonicSensor %s: no echo", self._name)
+            return None
+        return self._record(us)
+
+    def _echoIrq(self, pin):
+        # only store integers - runs in interrupt context
+        if pin.value():
+            self._rise = self._clock.ticks_us()
+        else:
+            self._pulse = self._clock.ticks_diff(self._clock.ticks_us(), self._rise)
+
+    def start(self):
+        """ irq mode: send a ping, the echo is timed by the interrupt """
+
+        self._pulse = -1
+        self._started = self._clock.ticks_us()
+        self._ping()
+
+    def collect(self):
+        """
+        irq mode: the distance in cm from the last start(), or None if it
+        is still in flight, timed out, or no ping was started
+        """
+
+        if self._started is None:
+            return None
+        us = self._pulse
+        if us >= 0:
+            self._started = None
+            return self._record(us)
+        if self._clock.ticks_diff(self._clock.ticks_us(), self._started) > 2 * self._timeout:
+            self._started = None
+            self._recordTimeout()
+        return None
+
+    def update(self):
+        """ irq mode: collect the ping in flight, then start the next one """
+
+        v = self.collect()
+        if self._started is None:
+            self.start()
+        return v
+
+    def median(self):
+        """ Median distance in cm over the last filterSize readings, None if there are none """
+
+        n = self._echoCount
+        if n == 0:
+            return None
+        buf = self._sorted
+        ring = self._echoRing
+        for i in range(n):
+            v = ring[i]
+            j = i - 1
+            while j >= 0 and buf[j] > v:
+                buf[j + 1] = buf[j]
+                j -= 1
+            buf[j + 1] = v
+        mid = n >> 1
+        us = buf[mid] if n & 1 else (buf[mid - 1] + buf[mid]) >> 1
+        if us > self._timeout:
+            # mostly timeouts: nothing in range
+            return None
+        return (us * 0.0343) / 2
 
     def tripped(self)->bool:
         """ sensor is tripped if distance is higher or lower than threshold """
         
-        v = self.rawValue()
+        if self._irq:
+            self.update()
+            v = self.median()
+        else:
+            v = self.rawValue()
+        if v is None:
+            return False
         if (self._lowActive and v < self._threshold) or (not self._lowActive and v > self._threshold):
-            Log.i(f"UltrasonicSensor {self._name}: sensor tripped")
+            Log.i("UltrasonicSensor %s: sensor tripped", self._name)
             return True
         else:
             return False
@@ -311,7 +606,7 @@ DHTData = namedtuple('DHTData', ('temperature', 'humidity'))
 
 # DHT11/DHT22 Sensor
 class DHTSensor(Sensor, TemperatureSensor):
-    def __init__(self, pin, name='DHT', lowActive=False, threshold=30, poll_delay=2000, sensor_type='DHT11'):
+    def __init__(self, pin, name='DHT', lowActive=False, threshold=30, poll_delay=2000, sensor_type='DHT11', clock=None):
         """
         Create a new DHT sensor - can take
         either the form of a DHT11 or DHT22 based on the sensor_type parameter
@@ -326,29 +621,39 @@ class DHTSensor(Sensor, TemperatureSensor):
 
         The threshold is set to 30 deg C by default, but can be changed. This is used to determine
         if the sensor is tripped or not. Only the temperature is used for tripping.
+
+        Readings are cached: the sensor is measured at most once per poll_delay ms and
+        temperature(), humidity(), rawValue() and tripped() all return values from the same
+        cached DHTData. measure() takes about 25 ms, so to keep it out of the game loop
+        call update() from a timer or a scheduled task instead; once update() has been
+        called, reads only ever return the cached reading.
         """
         
-        Sensor.__init__(self, name, lowActive)
+        Sensor.__init__(self, name, lowActive, clock)
         self._sensor_type = sensor_type
         self._sensor_class = dht.DHT11 if sensor_type == "DHT11" else dht.DHT22
         self._dht_sensor = self._sensor_class(Pin(pin))
         self._last_poll_time = 0
         self._poll_delay = poll_delay
         self._threshold = threshold
+        self._data = None
+        self._scheduled = False
 
     def temperature(self, unit='C'):
         """
-        Return the temperature of the sensor
+        Return the temperature of the sensor, None if it was never read successfully
         """
         
         (t, h) = self.rawValue()
 
+        if t is None:
+            return None
         if unit == 'C':
             return t
         elif unit == 'F':
             return self._celciusToFahrenheit(t)
         else:    
-            Log.e(f"Unknown unit {unit} for temperature")
+            Log.e("Unknown unit %s for temperature", unit)
             return None      
 
     def humidity(self):
@@ -364,23 +669,50 @@ class DHTSensor(Sensor, TemperatureSensor):
         Returns a tuple of temperature and humidity
         """
         
-        if utime.ticks_ms() - self._last_poll_time > self._poll_delay:
+        if not self._scheduled or self._data is None:
+            self._refresh()
+        return self._data
+
+    def update(self):
+        """
+        Scheduler hook: measure the sensor if the cached reading is older
+        than poll_delay. Returns True if a new reading was taken.
+        """
+
+        self._scheduled = True
+        return self._refresh()
+
+    def _refresh(self):
+        now = self._clock.ticks_ms()
+        if self._data is not None and self._clock.ticks_diff(now, self._last_poll_time) < self._poll_delay:
+            return False
+        self._last_poll_time = now
+        try:
             self._dht_sensor.measure()
-            self._last_poll_time = utime.ticks_ms()
-        return (DHTData(self._dht_sensor.temperature(), self._dht_sensor.humidity()))
+        except OSError:
+            # keep the last good reading, try again next period
+            Log.w("DHT Sensor %s: measure failed", self._name)
+            if self._data is None:
+                self._data = DHTData(None, None)
+            return False
+        self._data = DHTData(self._dht_sensor.temperature(), self._dht_sensor.humidity())
+        return True
 
     def tripped(self)->bool:
         """
         Sensor is tripped if temperature is higher or lower than threshold
         """
         
+        t = self.temperature()
+        if t is None:
+            return False
         if self._lowActive:
-            tripped = self.temperature() < self._threshold
+            tripped = t < self._threshold
         else:
-            tripped = self.temperature() >= self._threshold
+            tripped = t >= self._threshold
         
         if tripped:
-            Log.i(f"DHT Sensor {self._name}: sensor tripped")
+            Log.i("DHT Sensor %s: sensor tripped", self._name)
             
         return tripped
         
@@ -404,22 +736,35 @@ class MPU(Sensor, TemperatureSensor):
     The MPU6050 sensor is a 3.3V sensor, so ensure that the vcc pin of the sensor
     is connected to the 3.3V pin of the Pico. The sensor is connected to the I2C bus
     of the Pico, so ensure that the SDA and SCL pins are connected correctly.
+
+    For motion at hundreds of Hz (shaking, tapping) call startStream() and then
+    update() once per loop: each call drains the sensor FIFO in one burst read
+    and leaves the new samples in the driver's ax..gz columns (see MPU6050.py),
+    so the loop never has to poll the sensor sample by sample.
     """
 
-    def __init__(self, name='MPU6050', sda = 0, scl = 1, ofs=None, lowActive=False, threshold=30):
+    def __init__(self, name='MPU6050', sda = 0, scl = 1, ofs=None, lowActive=False, threshold=30, i2c=None):
         """
         Parameters:
         name: the name of the sensor
         sda, scl = the SDA and SCL pins of the I2C bus
         ofs = the calibration offsets of the sensor (if available)
+        i2c = an I2C object to use instead of making one from sda and scl
         """
 
+        # imported here so that importing Sensors without an IMU does not load the driver
+        from MPU6050 import MPU6050
+
         Sensor.__init__(self, name, lowActive)
         self._i2cid = -1 # lets set an invalid value to start with
         self._sda = sda
         self._scl = scl
         self._threshold = threshold
 
+        if i2c is not None:
+            self._mpu = MPU6050(ofs=ofs, i2c=i2c)
+            return
+
         if (sda == 0 and scl == 1) or (sda == 4 and scl == 5) or (sda == 8 and scl == 9) or (sda == 12 and scl == 13) or (sda == 16 and scl == 17) or (sda == 20 and scl == 21):    
             self._i2cid = 0
         elif (sda == 2 and scl == 3) or (sda == 6 and scl == 7) or (sda == 10 and scl == 11) or (sda == 14 and scl == 15) or (sda == 18 and scl == 19) or (sda == 26 and scl == 27):
@@ -432,10 +777,41 @@ class MPU(Sensor, TemperatureSensor):
     def calibrate(self):
         """
         Calibrate the sensor by placing it on a flat surface
-        re-initialize the sensor which will auto-calibrate
+        returns the new offsets
+        """
+
+        return self._mpu.calibrate()
+
+    def startStream(self, rate=200):
+        """
+        Start buffering motion samples in the sensor FIFO at rate Hz
+        """
+
+        self._mpu.startStream(rate)
+
+    def stopStream(self):
+        self._mpu.stopStream()
+
+    def update(self):
+        """
+        Drain the FIFO into the driver's sample columns, returns the number of new samples
+        """
+
+        return self._mpu.readFifo()
+
+    def samples(self):
+        """
+        The driver holding the samples of the last update(): count, ax, ay, az, gx, gy, gz
         """
 
-        self._mpu = MPU6050(self._i2cid, self._sda, self._scl)
+        return self._mpu
+
+    def shaken(self, g=0.5):
+        """
+        True if any sample of the last update() was more than g away from 1 g
+        """
+
+        return self._mpu.outsideG(g) > 0
 
     def temperature(self, unit='C'):
         """
@@ -447,7 +823,7 @@ class MPU(Sensor, TemperatureSensor):
         elif unit == 'F':
             return self._mpu.fahrenheit
         else:
-            Log.e(f"Unknown unit {unit} for temperature")
+            Log.e("Unknown unit %s for temperature", unit)
             return None
         
     def rawValue(self):
@@ -470,13 +846,16 @@ class MPU(Sensor, TemperatureSensor):
         Sensor is tripped if temperature is higher or lower than threshold
         """
 
+        t = self.temperature()
+        if t is None:
+            return False
         if self._lowActive:
-            tripped = self.temperature() < self._threshold
+            tripped = t < self._threshold
         else:
-            tripped = self.temperature() >= self._threshold
+            tripped = t >= self._threshold
         
         if tripped:
-            Log.i(f"DHT Sensor {self._name}: sensor tripped")
+            Log.i("DHT Sensor %s: sensor tripped", self._name)
             
         return tripped
 
@@ -488,6 +867,39 @@ if __name__ == "__main__":
     # Test the Sensors
     # A digital sensor connected to pin 11
     import time
+
+    # Thermistor table accuracy against the beta equation, -20..100 C
+    thermistor = Thermistor(pin=28)
+    worst = 0
+    worstAdc = 0
+    for adc in range(1, 65535):
+        exact = thermistor._formulaCelsius(adc)
+        if -20 <= exact <= 100:
+            err = abs(thermistor._adcToCelsius(adc) - exact)
+            if err > worst:
+                worst = err
+                worstAdc = adc
+    print(f"Thermistor table: max error {worst:.3f} C at ADC {worstAdc}")
+    codes = array('H', range(0, 65536, 4096))
+    print(f"Batch: {list(thermistor.centiCelsius(codes))}")
+
+    # Ultrasonic irq mode: once the echoes stop, the old close readings must
+    # not keep the sensor tripped (the interrupt is simulated on a VirtualClock)
+    from Clock import VirtualClock
+    clock = VirtualClock()
+    sonar = UltrasonicSensor(trigger=2, echo=3, irq=True, clock=clock)
+    for _ in range(5):
+        sonar.start()
+        sonar._pulse = 290      # about 5 cm
+        sonar.collect()
+    close = sonar.tripped()
+    for _ in range(20):
+        clock.advance(3 * sonar._timeout // 1000)
+        sonar.collect()
+        sonar.start()
+    print(f"Ultrasonic: tripped {close} when close, {sonar.tripped()} after 20 timeouts "
+          f"(median {sonar.median()}, {sonar.timeouts} timeouts)")
+    assert close and not sonar.tripped()
     
     while True:
         digital_sensor = DigitalSensor(pin=11, name='Test Digital Sensor')
@@ -4,8 +4,14 @@
 # Author: Arijit Sengupta
 """
 import time
+from array import array
 from Log import *
-from Sensors import DigitalSensor
+from Clock import SYSTEM_CLOCK
+from Sensors import DigitalSensor, AnalogSensor
+from Timers import SoftwareTimer
+
+# id of the built-in no_event
+NO_EVENT = 0
 
 class StateModel:
     """
@@ -47,7 +53,8 @@ class StateModel:
 
     * Timer events - these are generated by software or hardware timers. Created by calling
       the addTimer method - will create an event [name}_timeout. Again, two timers
-      cannot have the same name.
+      cannot have the same name. See Timers.py for SoftwareTimer (checked from run,
+      only when due) and HardwareTimer (machine.Timer).
     * "no_event" is for non-event-related transitions. So if a state performs 
        the entry actions and do actions and then immediately goes to the next state, 
        no_event can be used.
@@ -56,6 +63,12 @@ class StateModel:
       Controller must check the condition itself, and then call processEvent("eventname")
       when the codnition is satisfied.
 
+    Every event gets an integer id when it is added (no_event is NO_EVENT, 0).
+    Transitions may still be written with event names; they are resolved to
+    ids when the table is compiled, and button, sensor and timer events are
+    delivered by id so no event name string is built per event. Handlers
+    always receive the event name, taken from the model's name table.
+
     The calling class or the handler must override stateEntered and
     stateLeft to perform actions as per the state model
 
@@ -90,13 +103,32 @@ class StateModel:
         self._curState = -1
         self._handler = handler
         self._debug = debug
+        # Events are integer ids: _events maps an id back to its name and
+        # _eventIds maps a name to its id. no_event is always id 0.
         self._events = ['no_event']
+        self._eventIds = {'no_event': NO_EVENT}
+        # per-source event ids, so delivering an event builds no strings
+        self._pressIds = {}
+        self._releaseIds = {}
+        self._tripIds = {}
+        self._untripIds = {}
+        self._timeoutIds = {}
+        # transitions compiled into one {event id: toState} dict per state,
+        # rebuilt lazily after the table changes
+        self._compiled = None
+        # StateTrace while tracing is enabled, see enableTrace
+        self.tracer = None
         self._buttons = []
         self._timers = []
-        # Keep a list of sensors and their current status
-        # Digital sensors don't keep track of current status but we need them
-        # for non-digital sensors. So each item is a tuple (sensor, status)
-        self._sensors = [] # NEW - add a list for sensors that should be polled
+        # the TimerQueues of the software timers, each checked once per loop
+        self._timerQueues = []
+        self._sensors = []
+        # Digital sensors call the handler themselves; every other sensor is
+        # polled in run(). Its tripped status is kept in a parallel list.
+        self._polled = []
+        self._polledStatus = []
+        # analog sensors in sampling mode, fed one sample per loop in run()
+        self._sampled = []
 
     def addTransition(self, fromState, events, toState):
         """
@@ -107,12 +139,13 @@ class StateModel:
         """
 
         for event in events:
-            if event in self._events:
+            if event in self._eventIds:
                 if not self._transitions[fromState]:
                     self._transitions[fromState] = []
                 self._transitions[fromState].append((event,toState))
             else:
                 raise ValueError(f"Invalid event {event}")
+        self._compiled = None
             
     def setTransitionTable(self, transitions):
         """
@@ -137,24 +170,74 @@ class StateModel:
         # Check if the number of rows in the transition matrix is the same as the number of states
         if len(transitions) != self._numstates:
             self._numstates = len(transitions)
-            Log.e(f"Number of states in the transition matrix does not match the number of states in the model. Resetting the number of states to {self._numstates}")
+            Log.e("Number of states in the transition matrix does not match the number of states in the model. Resetting the number of states to %s", self._numstates)
         # Check if the events are valid
         for row in transitions:
             for (e,s) in row:
-                if e not in self._events:
+                if e not in self._eventIds:
                     raise ValueError(f"Invalid event {e}")
 
         self._transitions = transitions
+        self._compiled = None
+
+    def _compile(self):
+        """
+        Build one {event id: toState} dict per state from the transition
+        table, resolving event names to ids once. When an event appears twice
+        for a state the first one wins, as it did with the linear scan.
+        """
+
+        ids = self._eventIds
+        compiled = []
+        for row in self._transitions:
+            table = {}
+            if row:
+                for (e, s) in row:
+                    e = ids[e]
+                    if e not in table:
+                        table[e] = s
+            compiled.append(table)
+        self._compiled = compiled
+        return compiled
 
     def getTransition(self, fromState, event):
         """
-        Get the distination for this transition
+        Get the distination for this transition. event can be a name or an id.
         """
-        if self._transitions[fromState]:
-            for (e,s) in self._transitions[fromState]:
-                if e == event:
-                    return s
-        return -1
+        if type(event) is not int:
+            event = self._eventIds.get(event, -1)
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._compile()
+        return compiled[fromState].get(event, -1)
+
+    def eventId(self, name):
+        """ The integer id of an event name, raises ValueError if it is unknown """
+
+        try:
+            return self._eventIds[name]
+        except KeyError:
+            raise ValueError(f"Invalid event {name}")
+
+    def enableTrace(self, size=32, clock=None):
+        """
+        Start recording dwell times, transition and ignored-event counts and
+        the last size transitions. Returns the StateTrace. While tracing is
+        off the model only checks self.tracer against None.
+        """
+
+        self.tracer = StateTrace(self._numstates, size, clock)
+        if self._curState >= 0:
+            self.tracer.transition(-1, "no_event", self._curState)
+        return self.tracer
+
+    def disableTrace(self):
+        self.tracer = None
+
+    def eventName(self, event):
+        """ The name of an event id, for debugging """
+
+        return self._events[event]
         
     
     def start(self):
@@ -162,6 +245,9 @@ class StateModel:
         
         self._curState = 0
         self._running = True
+        self._compile()
+        if self.tracer is not None:
+            self.tracer.transition(-1, "no_event", 0)
         self._handler.stateEntered(self._curState, "no_event")  # start the state model
 
     def stop(self):
@@ -175,7 +261,7 @@ class StateModel:
         self._running = False
         for b in self._buttons:
             b.setHandler(None)
-        for (s, status) in self._sensors:
+        for s in self._sensors:
             if isinstance(s, DigitalSensor):
                 s.setHandler(None)
         for t in self._timers:
@@ -192,7 +278,9 @@ class StateModel:
         
         if (newState < self._numstates):
             if self._debug:
-                Log.d(f"Going from State {self._curState} to State {newState} on event {event}")
+                Log.d("Going from State %s to State %s on event %s", self._curState, newState, event)
+            if self.tracer is not None:
+                self.tracer.transition(self._curState, event, newState)
             self._handler.stateLeft(self._curState, event)
             self._curState = newState
             self._handler.stateEntered(self._curState, event)
@@ -204,25 +292,29 @@ class StateModel:
         a timeout event is supported. Handlers for the buttons and the timers should be
         incorporated in the main class, and processevent should be called when these handlers
         are triggered.
-        
-        I may try to improve this design a bit in the future, but for now this is how it is
-        built.
+
+        event can be an event name or its integer id (see eventId). Ids skip
+        the name lookup; the handler always receives the event name.
         """
-        
-        if (event in self._events):
-            
-            newstate = self.getTransition(self._curState, event)
-            if newstate >= 0:
-                if self._debug:
-                    Log.d(f"Processing event {event}")
-                self.gotoState(newstate, event)
-            else:
-                if self._debug:
-                    if event != "no_event":
-                        if not self._handler.stateEvent(self._curState, event):
-                            Log.d(f"Ignoring event {event}")                    
-        else:
+
+        if type(event) is not int:
+            event = self.eventId(event)
+        elif not 0 <= event < len(self._events):
             raise ValueError(f"Invalid event {event}")
+        name = self._events[event]
+
+        newstate = self.getTransition(self._curState, event)
+        if newstate >= 0:
+            if self._debug:
+                Log.d("Processing event %s", name)
+            self.gotoState(newstate, name)
+        else:
+            if self.tracer is not None and event != NO_EVENT:
+                self.tracer.ignore(self._curState, name)
+            if self._debug:
+                if event != NO_EVENT:
+                    if not self._handler.stateEvent(self._curState, name):
+                        Log.d("Ignoring event %s", name)
 
     def run(self, delay=0.1):        
         # Start the model first
@@ -235,47 +327,56 @@ class StateModel:
                         
             self._handler.stateDo(self._curState)
 
-            # Ping any software timer in the model
-            for timer in self._timers:
-                if type(timer).__name__ == 'SoftwareTimer':
-                    timer.check()
-
-            for (sensor, status) in self._sensors:
-                if isinstance(sensor, DigitalSensor):
-                    pass # Digital sensors will call the handler when tripped/untripped
+            # Fire the software timers that are due - one heap check per queue
+            for queue in self._timerQueues:
+                queue.check()
+
+            # Sampling-mode analog sensors take one non-blocking reading each
+            for sensor in self._sampled:
+                sensor.sample()
+
+            # Digital sensors will call the handler when tripped/untripped.
+            # For the others, there is no handler so we need to check their value manually
+            polled = self._polled
+            status = self._polledStatus
+            for i in range(len(polled)):
+                sensor = polled[i]
+                if sensor.tripped():
+                    if not status[i]:
+                        # Sensor was untripped, now tripped
+                        status[i] = True
+                        self.processEvent(self._tripIds[sensor._name])
                 else:
-                    # For analog sensors, there is no handler so we need to check their value manually
-                    if sensor.tripped():
-                        if not status:
-                            # Sensor was untripped, now tripped
-                            index = self._sensors.index((sensor, status))
-                            self._sensors[index] = (sensor, True)
-                            self.processEvent(f'{sensor._name}_trip')
-                    else:
-                        if status:
-                            # Sensor was tripped, now untripped
-                            index = self._sensors.index((sensor, status))
-                            self._sensors[index] = (sensor, False)
-                            self.processEvent(f'{sensor._name}_untrip')
+                    if status[i]:
+                        # Sensor was tripped, now untripped
+                        status[i] = False
+                        self.processEvent(self._untripIds[sensor._name])
 
             # I suggest putting in a short wait so you are not overloading the poor Pico
             if delay > 0:
                 time.sleep(delay)
 
             # If there is any no_event transition, lets process that now
-            self.processEvent("no_event")
+            self.processEvent(NO_EVENT)
 
 
+    def _addEvent(self, event):
+        """ Give a new event name the next id, returns the id """
+
+        self._eventIds[event] = len(self._events)
+        self._events.append(event)
+        return self._eventIds[event]
+
     def addButton(self, btn):
         btnname = btn._name
         event1 = f'{btnname}_press'
         event2 = f'{btnname}_release'
         
-        if event1 in self._events or event2 in self._events:
+        if event1 in self._eventIds or event2 in self._eventIds:
             raise ValueError(f'There is already a button with the name {btnname}')
         else:
-            self._events.append(event1)
-            self._events.append(event2)
+            self._pressIds[btnname] = self._addEvent(event1)
+            self._releaseIds[btnname] = self._addEvent(event2)
             btn.setHandler(self)
             self._buttons.append(btn)            
 
@@ -285,7 +386,7 @@ class StateModel:
         that have been added using the addButton method.
         """
 
-        self.processEvent(f'{name}_press')
+        self.processEvent(self._pressIds[name])
 
     def buttonReleased(self, name):
         """
@@ -293,7 +394,7 @@ class StateModel:
         As well as press or just want to do release events only.
         """
 
-        self.processEvent(f'{name}_release')
+        self.processEvent(self._releaseIds[name])
         
     def addTimer(self, timer):
         """
@@ -302,12 +403,14 @@ class StateModel:
         """
         
         eventname = f'{timer._name}_timeout'
-        if eventname in self._events:
+        if eventname in self._eventIds:
             raise ValueError(f'A timer with name {timer._name} already exists')
         else:
-            self._events.append(eventname)
+            self._timeoutIds[timer._name] = self._addEvent(eventname)
             timer.setHandler(self)
             self._timers.append(timer)
+            if isinstance(timer, SoftwareTimer) and timer._queue not in self._timerQueues:
+                self._timerQueues.append(timer._queue)
 
     def timeout(self, name):
         """
@@ -316,8 +419,7 @@ class StateModel:
         to be processed by the transition table
         """
         
-        eventname = f'{name}_timeout'
-        self.processEvent(eventname)
+        self.processEvent(self._timeoutIds[name])
 
     def addSensor(self, sensor):
         """
@@ -327,15 +429,20 @@ class StateModel:
 
         event1 = f'{sensor._name}_trip'
         event2 = f'{sensor._name}_untrip'
-        if event1 in self._events or event2 in self._events:
+        if event1 in self._eventIds or event2 in self._eventIds:
             raise ValueError(f'A sensor with name {sensor._name} already exists')
         else:
-            self._events.append(event1)
-            self._events.append(event2)
+            self._tripIds[sensor._name] = self._addEvent(event1)
+            self._untripIds[sensor._name] = self._addEvent(event2)
             # Check if sensor is instance of DigitalSensor
             if isinstance(sensor, DigitalSensor):
                 sensor.setHandler(self)
-            self._sensors.append((sensor, False))
+            else:
+                self._polled.append(sensor)
+                self._polledStatus.append(False)
+                if isinstance(sensor, AnalogSensor) and sensor.isSampling():
+                    self._sampled.append(sensor)
+            self._sensors.append(sensor)
 
     def sensorTripped(self, name):
         """
@@ -344,8 +451,7 @@ class StateModel:
         to be processed by the transition table
         """
 
-        eventname = f'{name}_trip'
-        self.processEvent(eventname)
+        self.processEvent(self._tripIds[name])
 
     def sensorUntripped(self, name):
         """
@@ -354,8 +460,7 @@ class StateModel:
         to be processed by the transition table
         """
 
-        eventname = f'{name}_untrip'
-        self.processEvent(eventname)
+        self.processEvent(self._untripIds[name])
 
     def addCustomEvent(self, event):
         """
@@ -366,10 +471,171 @@ class StateModel:
 
         All events must have distinct names. Exception will be raised if the
         event already exists.
+
+        Returns the event's integer id; passing that to processEvent skips
+        the name lookup.
         """
         
-        if event in self._events:
+        if event in self._eventIds:
             raise ValueError(f'An event with the name {event} already exists')
         else:
-            self._events.append(event)
+            return self._addEvent(event)
         
+
+
+class StateTrace:
+    """
+    Counters and a transition log for one StateModel, see enableTrace.
+
+    dwell[state] is the total ms spent in each state (not counting the
+    current visit, see dwellTimes), visits[state] how often it was entered,
+    transitions counts (from, event, to) and ignored counts (state, event)
+    for events that caused no transition. The last size transitions are
+    kept as (time ms, from, event, to) in a ring of preallocated arrays.
+    """
+
+    def __init__(self, numstates, size=32, clock=None):
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self.dwell = [0] * numstates
+        self.visits = [0] * numstates
+        self.transitions = {}
+        self.ignored = {}
+        self._state = -1
+        self._entered = self._clock.ticks_ms()
+        self._size = size
+        self._ringTime = array('l', [0] * size)
+        self._ringFrom = array('h', [0] * size)
+        self._ringTo = array('h', [0] * size)
+        self._ringEvent = [None] * size
+        self._ringPos = 0
+        self._ringCount = 0
+
+    def transition(self, old, event, new):
+        now = self._clock.ticks_ms()
+        if 0 <= old < len(self.dwell):
+            self.dwell[old] += self._clock.ticks_diff(now, self._entered)
+        self._entered = now
+        self._state = new
+        if new < len(self.visits):
+            self.visits[new] += 1
+        key = (old, event, new)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+
+        if self._size:
+            pos = self._ringPos
+            self._ringTime[pos] = now
+            self._ringFrom[pos] = old
+            self._ringTo[pos] = new
+            self._ringEvent[pos] = event
+            pos += 1
+            self._ringPos = 0 if pos == self._size else pos
+            if self._ringCount < self._size:
+                self._ringCount += 1
+
+    def ignore(self, state, event):
+        key = (state, event)
+        self.ignored[key] = self.ignored.get(key, 0) + 1
+
+    def dwellTimes(self):
+        """ ms spent in each state, including the visit in progress """
+
+        dwell = list(self.dwell)
+        if 0 <= self._state < len(dwell):
+            dwell[self._state] += self._clock.ticks_diff(self._clock.ticks_ms(), self._entered)
+        return dwell
+
+    def last(self):
+        """ The recorded transitions, oldest first, as (time ms, from, event, to) """
+
+        out = []
+        pos = self._ringPos - self._ringCount
+        for i in range(self._ringCount):
+            j = (pos + i) % self._size
+            out.append((self._ringTime[j], self._ringFrom[j], self._ringEvent[j], self._ringTo[j]))
+        return out
+
+    def dump(self):
+        """
+        Compact text dump, one record per line:
+            D state visits dwell_ms
+            T from event to count
+            I state event count
+            R time_ms from event to
+        """
+
+        lines = []
+        dwell = self.dwellTimes()
+        for state in range(len(dwell)):
+            lines.append("D %d %d %d" % (state, self.visits[state], dwell[state]))
+        for (old, event, new), n in self.transitions.items():
+            lines.append("T %d %s %d %d" % (old, event, new, n))
+        for (state, event), n in self.ignored.items():
+            lines.append("I %d %s %d" % (state, event, n))
+        for (t, old, event, new) in self.last():
+            lines.append("R %d %d %s %d" % (t, old, event, new))
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Microbenchmark: event dispatch on a large random model, compared with
+    # the linear scans processEvent used to do
+    import random
+    from Clock import SYSTEM_CLOCK as clock
+
+    class _Handler:
+        def stateEntered(self, state, event):
+            pass
+
+        def stateLeft(self, state, event):
+            pass
+
+        def stateEvent(self, state, event):
+            return False
+
+        def stateDo(self, state):
+            pass
+
+    STATES = 200
+    EVENTS = 300
+    PER_STATE = 40
+    N = 20000
+
+    model = StateModel(STATES, _Handler())
+    events = ['ev%d' % i for i in range(EVENTS)]
+    for e in events:
+        model.addCustomEvent(e)
+    for state in range(STATES):
+        for e in random.sample(events, PER_STATE):
+            model.addTransition(state, [e], random.randrange(STATES))
+    model.start()
+    stream = [random.choice(events) for _ in range(N)]
+    idStream = [model.eventId(e) for e in stream]
+
+    def linear(event):
+        # what processEvent did before: list membership plus a scan of the row
+        if event not in model._events:
+            raise ValueError(event)
+        row = model._transitions[model._curState]
+        if row:
+            for (e, s) in row:
+                if e == event:
+                    model.gotoState(s, event)
+                    return
+
+    for name, dispatch, evs in (("linear", linear, stream),
+                                ("compiled, names", model.processEvent, stream),
+                                ("compiled, ids", model.processEvent, idStream)):
+        model._curState = 0
+        t = clock.ticks_us()
+        for e in evs:
+            dispatch(e)
+        us = clock.ticks_diff(clock.ticks_us(), t)
+        print(f"{name}: {N} events over {STATES} states / {EVENTS} events in {us // 1000} ms, {us / N:.2f} us/event")
+
+    model.enableTrace(32)
+    model._curState = 0
+    t = clock.ticks_us()
+    for e in idStream:
+        model.processEvent(e)
+    us = clock.ticks_diff(clock.ticks_us(), t)
+    print(f"compiled, ids, traced: {us // 1000} ms, {us / N:.2f} us/event")
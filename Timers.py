@@ -0,0 +1,170 @@
+"""
+# Timers.py
+# One-shot timers for StateModel: software timers sharing one deadline heap,
+# and hardware timers backed by machine.Timer
+"""
+
+import micropython
+from machine import Timer
+from Log import *
+from Clock import SYSTEM_CLOCK
+from DeadlineHeap import DeadlineHeap
+
+
+class TimerQueue:
+    """
+    The software timer deadlines on one DeadlineHeap. check() only pops
+    the timers that are due, so it costs one comparison when none are,
+    however many timers are waiting. Cancelling or restarting a timer
+    bumps its _gen, which makes its old entry stale.
+    """
+
+    def __init__(self, clock=None):
+        self._clock = clock if clock is not None else SYSTEM_CLOCK
+        self._heap = DeadlineHeap(self._clock)
+
+    def schedule(self, timer, ms):
+        """ Queue timer to fire ms from now """
+
+        heap = self._heap
+        heap.push(timer, heap.time() + ms)
+
+    def nextDue(self):
+        """ ms until the next timer fires, 0 if overdue, -1 if none is running """
+
+        t = self._heap.time()
+        deadline = self._heap.nextDeadline()
+        if deadline is None:
+            return -1
+        return deadline - t if deadline > t else 0
+
+    def check(self):
+        """ Fire every timer that is due, returns how many fired """
+
+        heap = self._heap
+        if not len(heap):
+            return 0
+        t = heap.time()
+        n = 0
+        while True:
+            entry = heap.pop(t)
+            if entry is None:
+                return n
+            entry[3]._fire()
+            n += 1
+
+
+# Shared default heap for software timers that are not given one
+TIMER_QUEUE = TimerQueue()
+
+
+class SoftwareTimer:
+    """
+    A one-shot timer that is checked from a loop instead of an interrupt.
+    start(timeout) arms it for timeout seconds; when it is due, the next
+    check() calls handler.timeout(name). All timers on the same TimerQueue
+    are checked together, so a loop only needs to call check() on one of
+    them (StateModel.run checks each queue once).
+    """
+
+    def __init__(self, name='Timer', handler=None, queue=None):
+        self._name = name
+        self._handler = handler
+        self._queue = queue if queue is not None else TIMER_QUEUE
+        self._active = False
+        self._gen = 0
+
+    def setHandler(self, handler):
+        self._handler = handler
+
+    def start(self, timeout):
+        """ Arm the timer for timeout seconds, restarting it if it is running """
+
+        Log.i('SoftwareTimer %s started for %s s', self._name, timeout)
+        self._gen += 1
+        self._active = True
+        self._queue.schedule(self, int(timeout * 1000))
+
+    def cancel(self):
+        self._active = False
+        self._gen += 1
+
+    def isRunning(self):
+        return self._active
+
+    def check(self):
+        """ Fire any timer on this timer's queue that is due """
+
+        return self._queue.check()
+
+    def _fire(self):
+        self._active = False
+        if self._handler is not None:
+            self._handler.timeout(self._name)
+
+
+class HardwareTimer:
+    """
+    A one-shot timer on a machine.Timer. The interrupt only asks
+    micropython.schedule to run the handler, so handler.timeout(name)
+    runs outside interrupt context, like any other event reaching a
+    StateModel. timerid defaults to -1, a virtual timer on the Pico.
+    """
+
+    def __init__(self, name='Timer', handler=None, timerid=-1):
+        self._name = name
+        self._handler = handler
+        self._timerid = timerid
+        self._timer = None
+        self._active = False
+        # bound once so the interrupt handler allocates nothing
+        self._scheduledRef = self._scheduled
+        self._irqRef = self._irq
+
+    def setHandler(self, handler):
+        self._handler = handler
+
+    def start(self, timeout):
+        """ Arm the timer for timeout seconds, restarting it if it is running """
+
+        Log.i('HardwareTimer %s started for %s s', self._name, timeout)
+        if self._timer is None:
+            self._timer = Timer(self._timerid)
+        self._active = True
+        self._timer.init(mode=Timer.ONE_SHOT, period=int(timeout * 1000), callback=self._irqRef)
+
+    def cancel(self):
+        self._active = False
+        if self._timer is not None:
+            self._timer.deinit()
+
+    def isRunning(self):
+        return self._active
+
+    def _irq(self, t):
+        micropython.schedule(self._scheduledRef, 0)
+
+    def _scheduled(self, arg):
+        if not self._active:
+            return
+        self._active = False
+        if self._handler is not None:
+            self._handler.timeout(self._name)
+
+
+if __name__ == "__main__":
+    from Clock import VirtualClock
+
+    class Handler:
+        def timeout(self, name):
+            print(f"{clock.ticks_ms()} ms: {name} timed out")
+
+    clock = VirtualClock()
+    queue = TimerQueue(clock)
+    timers = [SoftwareTimer(f"t{i}", Handler(), queue) for i in range(5)]
+    for i, timer in enumerate(timers):
+        timer.start(0.5 * (5 - i))
+    timers[2].cancel()
+    while queue.nextDue() >= 0:
+        clock.sleep_ms(queue.nextDue())
+        queue.check()
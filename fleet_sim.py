@@ -0,0 +1,257 @@
+"""
+# fleet_sim.py
+# Host-side simulator for tuning the pet decay constants. Holds thousands
+# of pets as NumPy columns and applies Pet.tick, feed, play, clean and
+# mood() to all of them at once. Needs NumPy, so it does not run on the Pico.
+#
+#     python fleet_sim.py [pets] [seconds]
+#
+# The rules here must stay in step with pet.py; running this module checks
+# the fleet against real Pet objects before it runs the demo policies.
+"""
+
+import sys
+import time
+import numpy as np
+
+from pet import Pet
+
+# mood codes, indexes into MOODS
+SAD = 0
+OK = 1
+HAPPY = 2
+MOODS = ("Sad", "OK", "Happy")
+
+
+class Fleet:
+    """
+    n pets stored as int32 columns. As in TamaGame, a pet dies when
+    Pet.dead() holds after two consecutive ticks; zero_since holds the tick
+    it first held, or -1. Dead pets stop ticking and ignore care actions;
+    death_tick holds the second it happened, or -1 while the pet is alive.
+    """
+
+    def __init__(self, n, hunger=50, happy=80, energy=80, dirty=0):
+        self.n = n
+        self.hunger = np.full(n, hunger, dtype=np.int32)
+        self.happy = np.full(n, happy, dtype=np.int32)
+        self.energy = np.full(n, energy, dtype=np.int32)
+        self.dirty = np.full(n, dirty, dtype=np.int32)
+        self.alive = np.ones(n, dtype=bool)
+        self.death_tick = np.full(n, -1, dtype=np.int32)
+        self.zero_since = np.full(n, -1, dtype=np.int32)
+        self.t = 0
+
+    @classmethod
+    def from_pets(cls, pets):
+        fleet = cls(len(pets))
+        fleet.hunger[:] = [p.hunger for p in pets]
+        fleet.happy[:] = [p.happy for p in pets]
+        fleet.energy[:] = [p.energy for p in pets]
+        fleet.dirty[:] = [p.dirty for p in pets]
+        return fleet
+
+    def tick(self):
+        """ One Pet.tick() on every living pet, then record deaths """
+
+        live = self.alive
+        h, p, e, d = self.hunger, self.happy, self.energy, self.dirty
+        h -= live & (h > 0)
+        e -= live & (e > 0)
+        d += 2 * (live & (d < 100))
+        p -= 2 * (live & (p > 0) & ((h < 30) | (e < 30) | (d > 60)))
+        self.t += 1
+        zero = live & self.dead()
+        armed = self.zero_since >= 0
+        died = zero & armed
+        self.zero_since = np.where(zero, np.where(armed, self.zero_since, self.t), -1).astype(np.int32)
+        if died.any():
+            self.death_tick[died] = self.t
+            self.alive &= ~died
+
+    def feed(self, mask):
+        m = mask & self.alive
+        self.hunger[m] = np.minimum(100, self.hunger[m] + 25)
+        self.energy[m] = np.minimum(100, self.energy[m] + 5)
+
+    def play(self, mask):
+        m = mask & self.alive & (self.energy > 10) & (self.hunger > 10)
+        self.happy[m] = np.minimum(100, self.happy[m] + 18)
+        self.energy[m] = np.maximum(0, self.energy[m] - 10)
+        self.hunger[m] = np.maximum(0, self.hunger[m] - 8)
+
+    def clean(self, mask):
+        m = mask & self.alive
+        self.dirty[m] = np.maximum(0, self.dirty[m] - 40)
+        self.happy[m] = np.minimum(100, self.happy[m] + 10)
+
+    def mood(self):
+        """ Array of mood codes (SAD, OK, HAPPY), same rules as Pet.mood() """
+
+        sad = (self.hunger < 20) | (self.energy < 20) | (self.dirty > 80)
+        happy = ~sad & (self.happy > 70) & (self.dirty < 50)
+        return np.where(sad, SAD, np.where(happy, HAPPY, OK))
+
+    def dead(self):
+        return (self.hunger == 0) & (self.happy == 0) & (self.energy == 0) & (self.dirty == 100)
+
+
+class RandomPolicy:
+    """ Every second each pet independently feeds/plays/cleans with the given probability """
+
+    def __init__(self, feed=0.0, play=0.0, clean=0.0, seed=None):
+        self.p = (feed, play, clean)
+        self.rng = np.random.default_rng(seed)
+
+    def actions(self, fleet):
+        return tuple(self.rng.random(fleet.n) < p if p > 0 else None for p in self.p)
+
+
+class ScriptedPolicy:
+    """
+    The same script for every pet: a list of (second, action) pairs with
+    action one of "feed", "play" or "clean". With a period the script
+    repeats, e.g. [(0, "feed"), (60, "clean")] with period 120.
+    """
+
+    def __init__(self, script, period=None):
+        self.script = {}
+        for (second, action) in script:
+            self.script.setdefault(second, []).append(action)
+        self.period = period
+
+    def actions(self, fleet):
+        t = fleet.t % self.period if self.period else fleet.t
+        todo = self.script.get(t, ())
+        everyone = np.ones(fleet.n, dtype=bool)
+        return tuple(everyone if a in todo else None for a in ("feed", "play", "clean"))
+
+
+class ThresholdPolicy:
+    """ A caring player: feeds, plays or cleans as soon as a stat crosses its threshold """
+
+    def __init__(self, hunger=30, happy=40, dirty=60):
+        self.hunger = hunger
+        self.happy = happy
+        self.dirty = dirty
+
+    def actions(self, fleet):
+        return (fleet.hunger < self.hunger, fleet.happy < self.happy, fleet.dirty > self.dirty)
+
+
+def simulate(fleet, policy, seconds):
+    """
+    Run the fleet for up to seconds. Each second the policy's care actions
+    are applied, then every pet ticks. Returns a dict with the death tick of
+    every pet (-1 = survived), the pet-seconds spent in each mood while
+    alive, and the throughput.
+    """
+
+    mood_seconds = np.zeros(len(MOODS), dtype=np.int64)
+    pet_ticks = 0
+    start = time.perf_counter()
+    for _ in range(seconds):
+        if not fleet.alive.any():
+            break
+        feed, play, clean = policy.actions(fleet)
+        if feed is not None:
+            fleet.feed(feed)
+        if play is not None:
+            fleet.play(play)
+        if clean is not None:
+            fleet.clean(clean)
+        pet_ticks += int(fleet.alive.sum())
+        fleet.tick()
+        mood_seconds += np.bincount(fleet.mood()[fleet.alive], minlength=len(MOODS))
+    elapsed = time.perf_counter() - start
+    return {
+        "death_tick": fleet.death_tick.copy(),
+        "mood_seconds": mood_seconds,
+        "pet_ticks": pet_ticks,
+        "elapsed": elapsed,
+    }
+
+
+def summarize(result):
+    """ Human readable time-to-death and mood occupancy summary """
+
+    deaths = result["death_tick"]
+    dead = deaths[deaths >= 0]
+    lines = [f"pets: {len(deaths)}, died: {len(dead)}"]
+    if len(dead):
+        p = np.percentile(dead, (0, 10, 50, 90, 100))
+        lines.append("time to death (s) min/p10/median/p90/max: " + " / ".join(f"{v:.0f}" for v in p))
+    total = result["mood_seconds"].sum()
+    if total:
+        lines.append("mood occupancy: " + ", ".join(
+            f"{name} {100 * n / total:.1f}%" for name, n in zip(MOODS, result["mood_seconds"])))
+    if result["elapsed"] > 0:
+        lines.append(f"{result['pet_ticks'] / result['elapsed'] / 1e6:.1f}M pet-ticks/s")
+    return "\n".join(lines)
+
+
+def check_against_pet(n=500, seconds=600, seed=1):
+    """
+    Run n real Pet objects and a Fleet side by side under the same random
+    actions and raise AssertionError on the first difference.
+    """
+
+    rng = np.random.default_rng(seed)
+    pets = []
+    for _ in range(n):
+        pet = Pet("p")
+        pet.hunger, pet.happy, pet.energy, pet.dirty = (int(v) for v in rng.integers(0, 101, 4))
+        pets.append(pet)
+    fleet = Fleet.from_pets(pets)
+    alive = [True] * n
+    zero_since = [None] * n
+    death = [-1] * n
+    for t in range(1, seconds + 1):
+        feed, play, clean = (rng.random(n) < 0.05 for _ in range(3))
+        for i, pet in enumerate(pets):
+            if alive[i]:
+                if feed[i]:
+                    pet.feed()
+                if play[i]:
+                    pet.play()
+                if clean[i]:
+                    pet.clean()
+                pet.tick()
+                # TamaGame.update_pet: dead() must hold on two ticks in a row
+                if not pet.dead():
+                    zero_since[i] = None
+                elif zero_since[i] is None:
+                    zero_since[i] = t
+                else:
+                    alive[i] = False
+                    death[i] = t
+        fleet.feed(feed)
+        fleet.play(play)
+        fleet.clean(clean)
+        fleet.tick()
+        moods = fleet.mood()
+        for i, pet in enumerate(pets):
+            state = (pet.hunger, pet.happy, pet.energy, pet.dirty)
+            col = (fleet.hunger[i], fleet.happy[i], fleet.energy[i], fleet.dirty[i])
+            assert state == tuple(int(v) for v in col), (t, i, state, col)
+            assert MOODS[moods[i]] == pet.mood(), (t, i)
+            assert alive[i] == bool(fleet.alive[i]), (t, i)
+    assert death == [int(v) for v in fleet.death_tick]
+
+
+if __name__ == "__main__":
+    pets = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 3600
+
+    check_against_pet()
+    print("Fleet matches pet.Pet")
+
+    policies = (
+        ("no care", RandomPolicy()),
+        ("random care", RandomPolicy(feed=0.01, play=0.01, clean=0.01, seed=2)),
+        ("feed+clean every 2 min", ScriptedPolicy([(0, "feed"), (60, "clean")], period=120)),
+        ("threshold care", ThresholdPolicy()),
+    )
+    for name, policy in policies:
+        print(f"\n== {name}")
+        print(summarize(simulate(Fleet(pets), policy, seconds)))
@@ -0,0 +1,448 @@
+"""
+# harness.py
+# Host-side Monte Carlo harness: plays many headless TamaGame sessions with
+# scripted care strategies in parallel and merges the results, for judging
+# rule changes in pet.py and tama.py. Runs on CPython only.
+#
+#     python harness.py [sessions per strategy] [max days] [workers]
+#
+# Each session runs the real TamaGame on a VirtualClock with the display,
+# buzzer and pins stubbed out. Button presses go through TamaInputHandler,
+# and the time between two decisions is skipped in one step with
+# Pet.advance, so a neglected pet costs the same whatever the gap.
+"""
+
+import os
+import sys
+import time
+import random
+import types
+
+
+def install_host_stubs():
+    """
+    Register minimal stand-ins for the MicroPython modules the game imports
+    (machine, dht, framebuf, micropython). Real modules are left alone.
+    """
+
+    def missing(name):
+        if name in sys.modules:
+            return False
+        try:
+            __import__(name)
+            return False
+        except ImportError:
+            return True
+
+    if missing("machine"):
+        machine = types.ModuleType("machine")
+
+        class Pin:
+            IN = 0
+            OUT = 1
+            PULL_UP = 1
+            PULL_DOWN = 2
+            IRQ_FALLING = 4
+            IRQ_RISING = 8
+
+            def __init__(self, pin, *args, **kwargs):
+                self._value = 1
+
+            def irq(self, trigger=0, handler=None):
+                pass
+
+            def value(self, v=None):
+                if v is None:
+                    return self._value
+                self._value = v
+
+            def on(self):
+                self._value = 1
+
+            def off(self):
+                self._value = 0
+
+        class ADC:
+            def __init__(self, pin):
+                pass
+
+            def read_u16(self):
+                return 0
+
+        class PWM:
+            def __init__(self, pin, *args, **kwargs):
+                pass
+
+            def freq(self, f=None):
+                return 0
+
+            def duty_u16(self, d=None):
+                return 0
+
+            def deinit(self):
+                pass
+
+        class Timer:
+            PERIODIC = 1
+            ONE_SHOT = 0
+
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def init(self, *args, **kwargs):
+                pass
+
+            def deinit(self):
+                pass
+
+        class I2C:
+            def __init__(self, *args, **kwargs):
+                pass
+
+        machine.Pin = Pin
+        machine.ADC = ADC
+        machine.PWM = PWM
+        machine.Timer = Timer
+        machine.I2C = I2C
+        machine.time_pulse_us = lambda pin, level, timeout_us: -1
+        sys.modules["machine"] = machine
+
+    if missing("dht"):
+        dht = types.ModuleType("dht")
+
+        class DHT11:
+            def __init__(self, pin):
+                pass
+
+            def measure(self):
+                pass
+
+            def temperature(self):
+                return 0
+
+            def humidity(self):
+                return 0
+
+        dht.DHT11 = DHT11
+        dht.DHT22 = DHT11
+        sys.modules["dht"] = dht
+
+    if missing("framebuf"):
+        framebuf = types.ModuleType("framebuf")
+        framebuf.MONO_VLSB = 0
+
+        class FrameBuffer:
+            def __init__(self, buf, width, height, fmt, stride=None):
+                self.width = width
+                self.height = height
+
+        framebuf.FrameBuffer = FrameBuffer
+        sys.modules["framebuf"] = framebuf
+
+    if missing("micropython"):
+        micropython = types.ModuleType("micropython")
+        micropython.const = lambda x: x
+        micropython.schedule = lambda func, arg: func(arg)
+        sys.modules["micropython"] = micropython
+
+
+install_host_stubs()
+
+from Clock import VirtualClock
+from pet import Pet
+from tama import TamaGame
+
+ACTIONS = ("food", "play", "clean")
+STATE_NAMES = ("idle", "playing", "eating", "cleaning", "dead")
+DAY = 24 * 60 * 60
+
+
+class NullDisplay:
+    """ Accepts every drawing call the game makes and draws nothing """
+
+    def fill(self, c):
+        pass
+
+    def fill_rect(self, x, y, w, h, c):
+        pass
+
+    def text(self, s, x, y, c=1):
+        pass
+
+    def blit(self, fb, x, y, key=-1):
+        pass
+
+    def show(self, full=False):
+        pass
+
+
+class NullBuzzer:
+    """ A silent buzzer that counts what it was asked to play """
+
+    def __init__(self):
+        self.beeps = 0
+        self.melodies = 0
+
+    def beep(self, tone=500, duration=100):
+        self.beeps += 1
+
+    def playMelody(self, notes):
+        self.melodies += 1
+
+    def update(self):
+        pass
+
+    def busy(self):
+        return False
+
+    def timeToNext(self):
+        return -1
+
+    def cancel(self):
+        pass
+
+
+class HeadlessGame(TamaGame):
+    """
+    TamaGame without a screen. Counts state-model transitions as
+    (from, to) pairs and remembers the game time of death.
+    """
+
+    def __init__(self, clock, fast=True):
+        # the state model starts from TamaGame.__init__, so set these first
+        self.transitions = {}
+        self.died_at = None
+        self._left = -1
+        self.fast = fast
+        super().__init__(NullDisplay(), NullBuzzer(), 18, 17, 16, clock=clock)
+        if fast:
+            # nobody watches the idle loop; only action animations need to run
+            self.anim.stop(self.idle_anim)
+
+    def stateLeft(self, state, event):
+        self._left = state
+
+    def stateEntered(self, state, event):
+        key = (self._left, state)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        super().stateEntered(state, event)
+
+    def _enter_idle(self, state):
+        super()._enter_idle(state)
+        if self.fast:
+            self.anim.stop(self.idle_anim)
+
+    def start_death_animation(self):
+        self.died_at = self.clock.ticks_ms()
+        super().start_death_animation()
+
+    def press(self, name):
+        """ One press and release of a button, as the input handler sees it """
+        self.input_handler.buttonPressed(name)
+        self.input_handler.buttonReleased(name)
+
+    def care(self, action):
+        """ Move the menu to action ("food", "play" or "clean") and select it """
+        target = self.menu_items.index(action)
+        presses = 1
+        while self.selected != target:
+            self.press("clean")
+            presses += 1
+        self.press("play")
+        return presses
+
+    def settle(self):
+        """ Let a running action animation play out in game time """
+        while self.action is not None and not self.is_dead:
+            self.simulate(self.next_deadline())
+
+    def skip(self, seconds):
+        """
+        Jump seconds of game time in one step. If the pet dies on the way,
+        stop on the tick the game notices it. Returns the seconds skipped.
+        """
+        if seconds <= 0 or self.is_dead:
+            return 0
+        p = self.pet
+        probe = Pet(p.name)
+        probe.hunger, probe.happy, probe.energy, probe.dirty = p.hunger, p.happy, p.energy, p.dirty
+        died = probe.advance(seconds)
+        if died is not None and died < seconds:
+            # the game needs the condition to hold on one more tick
+            seconds = died + 1
+        ms = seconds * 1000
+        self.clock.advance(ms)
+        self.last_tick = self.clock.ticks_add(self.last_tick, ms)
+        self.catch_up(seconds)
+        return seconds
+
+
+# ======= Strategies =======
+# Strategies are top-level classes so they can be pickled to the worker
+# processes and must keep no per-session state: next(game, rng, step) gets
+# the session's decision count and returns (seconds to wait, action or None).
+
+class Neglect:
+    """ Never touches the pet """
+
+    name = "neglect"
+
+    def next(self, game, rng, step):
+        return (DAY, None)
+
+
+class Schedule:
+    """ A fixed repeating list of (seconds to wait, action) steps """
+
+    def __init__(self, steps, name="schedule"):
+        self.steps = steps
+        self.name = name
+
+    def next(self, game, rng, step):
+        return self.steps[step % len(self.steps)]
+
+
+class Threshold:
+    """ Checks on the pet every `every` seconds and fixes the worst stat """
+
+    def __init__(self, every=10, hunger=40, happy=40, dirty=50):
+        self.every = every
+        self.hunger = hunger
+        self.happy = happy
+        self.dirty = dirty
+        self.name = "threshold/%ds" % every
+
+    def next(self, game, rng, step):
+        p = game.pet
+        if p.hunger < self.hunger:
+            return (self.every, "food")
+        if p.dirty > self.dirty:
+            return (self.every, "clean")
+        if p.happy < self.happy:
+            return (self.every, "play")
+        return (self.every, None)
+
+
+class RandomCare:
+    """ A distracted player: exponential gaps around mean seconds, random actions """
+
+    def __init__(self, mean=20, name=None):
+        self.mean = mean
+        self.name = name or "random/%ds" % mean
+
+    def next(self, game, rng, step):
+        return (max(1, int(rng.expovariate(1 / self.mean))), rng.choice(ACTIONS))
+
+
+# ======= Sessions =======
+
+def run_session(job):
+    """ Play one session. job is (strategy, seed, max_days), returns a result dict. """
+
+    strategy, seed, max_days = job
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    game = HeadlessGame(clock)
+    end = max_days * DAY * 1000
+    actions = dict.fromkeys(ACTIONS, 0)
+    presses = 0
+    step = 0
+    while not game.is_dead:
+        left = (end - clock.ticks_ms()) // 1000
+        if left <= 0:
+            break
+        wait, action = strategy.next(game, rng, step)
+        step += 1
+        if action is not None:
+            presses += game.care(action)
+            actions[action] += 1
+            game.settle()
+        game.skip(min(wait, left))
+    return {
+        "strategy": strategy.name,
+        "sessions": 1,
+        "survival": [game.died_at // 1000 if game.died_at is not None else None],
+        "seconds": clock.ticks_ms() // 1000,
+        "actions": actions,
+        "presses": presses,
+        "transitions": game.transitions,
+    }
+
+
+def merge(a, b):
+    """ Combine two result dicts of the same strategy """
+
+    out = {
+        "strategy": a["strategy"],
+        "sessions": a["sessions"] + b["sessions"],
+        "survival": a["survival"] + b["survival"],
+        "seconds": a["seconds"] + b["seconds"],
+        "presses": a["presses"] + b["presses"],
+        "actions": dict(a["actions"]),
+        "transitions": dict(a["transitions"]),
+    }
+    for k, v in b["actions"].items():
+        out["actions"][k] = out["actions"].get(k, 0) + v
+    for k, v in b["transitions"].items():
+        out["transitions"][k] = out["transitions"].get(k, 0) + v
+    return out
+
+
+def run(strategies, sessions, max_days, workers=None, seed=0):
+    """
+    Play sessions games per strategy across a process pool and return one
+    merged result per strategy name, in the order given.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = [(s, seed * 1000003 + i, max_days) for s in strategies for i in range(sessions)]
+    results = {}
+    chunk = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for r in pool.map(run_session, jobs, chunksize=chunk):
+            name = r["strategy"]
+            results[name] = merge(results[name], r) if name in results else r
+    return [results[s.name] for s in strategies if s.name in results]
+
+
+def report(result):
+    """ Human readable summary of a merged result """
+
+    n = result["sessions"]
+    deaths = sorted(s for s in result["survival"] if s is not None)
+    lines = ["== %s: %d sessions, %.1f simulated days" % (result["strategy"], n, result["seconds"] / DAY)]
+    if deaths:
+        pick = lambda q: deaths[min(len(deaths) - 1, int(q * len(deaths)))]
+        lines.append("died: %d (%.0f%%), survival s min/median/max: %d / %d / %d" % (
+            len(deaths), 100 * len(deaths) / n, deaths[0], pick(0.5), deaths[-1]))
+    else:
+        lines.append("died: 0")
+    lines.append("actions: " + ", ".join("%s %d" % kv for kv in result["actions"].items())
+                 + ", button presses %d" % result["presses"])
+    lines.append("transitions: " + ", ".join(
+        "%s->%s %d" % (STATE_NAMES[f] if f >= 0 else "start", STATE_NAMES[s], c)
+        for (f, s), c in sorted(result["transitions"].items())))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    strategies = [
+        Neglect(),
+        Schedule([(15, "food"), (15, "clean"), (15, "play")], name="feed/clean/play every 15s"),
+        Threshold(every=5),
+        Threshold(every=20),
+        RandomCare(mean=10),
+    ]
+    start = time.perf_counter()
+    results = run(strategies, sessions, days, workers)
+    elapsed = time.perf_counter() - start
+    total = 0
+    for r in results:
+        print(report(r))
+        total += r["seconds"]
+    print("\n%.0f simulated days in %.1fs" % (total / DAY, elapsed))
@@ -5,9 +5,14 @@ import ssd1306
 from Log import Log
 from Buzzer import PassiveBuzzer
 from Sensors import DigitalSensor
+from SaveState import SaveState
+from Clock import SYSTEM_CLOCK
 
 from tama import TamaGame
 
+# Run the game as cooperative asyncio tasks instead of the 30 ms polling loop
+USE_ASYNC = True
+
 
 def main():
     Log.i("Starting Mochi Tama")
@@ -18,7 +23,7 @@ def main():
     display = ssd1306.SSD1306_I2C(128, 64, i2c)
 
     buzzer = PassiveBuzzer(pin=14, name="Buzz")
-    pir = DigitalSensor(pin=10, name="PIR", lowActive=False)
+    pir = DigitalSensor(pin=10, name="PIR", lowActive=False, clock=SYSTEM_CLOCK)
 
     game = TamaGame(
         display=display,
@@ -26,9 +31,15 @@ def main():
         feed_pin=18,   # left nav
         play_pin=17,   # select button
         clean_pin=16,  # right nav
-        pir_sensor=pir
+        pir_sensor=pir,
+        clock=SYSTEM_CLOCK,
+        save=SaveState("tama.sav")
     )
-    game.run()
+    if USE_ASYNC:
+        import uasyncio as asyncio
+        asyncio.run(game.run_async())
+    else:
+        game.run()
 
 
 if __name__ == "__main__":
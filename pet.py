@@ -16,6 +16,55 @@ class Pet:
         if self.happy > 0 and (self.hunger < 30 or self.energy < 30 or self.dirty > 60):
             self.happy -= 2
 
+    def advance(self, seconds):
+        """
+        Apply `seconds` calls of tick() in constant time.
+        Returns the tick (1..seconds) after which the death condition
+        (hunger, happy and energy at 0, dirty at 100) first held, 0 if it
+        already held, or None if it never did.
+        """
+        n = seconds
+        if n <= 0:
+            return 0 if self.dead() else None
+        h0, e0, d0, p0 = self.hunger, self.energy, self.dirty, self.happy
+
+        # dirty goes up by 2 while below 100 (an odd start ends at 101)
+        dirty_ticks = (101 - d0) // 2 if d0 < 100 else 0
+
+        # happy starts dropping on the first tick that ends with
+        # hunger < 30, energy < 30 or dirty > 60 - all three stay true after
+        start = min(
+            1 if h0 < 30 else h0 - 29,
+            1 if e0 < 30 else e0 - 29,
+            1 if d0 > 60 else (60 - d0) // 2 + 1,
+        )
+        happy_ticks = (p0 + 1) // 2 if p0 > 0 else 0
+
+        if h0 > 0:
+            self.hunger = max(0, h0 - n)
+        if e0 > 0:
+            self.energy = max(0, e0 - n)
+        self.dirty = d0 + 2 * min(n, dirty_ticks)
+        self.happy = p0 - 2 * min(max(0, n - start + 1), happy_ticks)
+
+        # each stat reaches its death value at a known tick and stays there
+        reached = []
+        for (v, t) in ((h0, h0), (e0, e0)):
+            if v < 0:
+                return None
+            reached.append(t)
+        if d0 > 100 or (100 - d0) % 2:
+            return None
+        reached.append(dirty_ticks)
+        if p0 < 0 or p0 % 2:
+            return None
+        reached.append(start + happy_ticks - 1 if p0 > 0 else 0)
+        died = max(reached)
+        return died if died <= n else None
+
+    def dead(self):
+        return self.hunger == 0 and self.happy == 0 and self.energy == 0 and self.dirty == 100
+
     def feed(self):
         self.hunger = min(100, self.hunger + 25)
         self.energy = min(100, self.energy + 5)
@@ -36,3 +85,33 @@ class Pet:
         if self.happy > 70 and self.dirty < 50:
             return "Happy"
         return "OK"
+
+
+def check_against_tick(n=2000, seed=1):
+    """
+    Compare advance(gap) with gap calls of tick() for n pets with random
+    stats and gaps, including the returned death tick, and raise
+    AssertionError on the first difference.
+    """
+    import random
+    random.seed(seed)
+    for i in range(n):
+        a = Pet("a")
+        a.hunger, a.happy, a.energy, a.dirty = (random.randint(0, 100) for _ in range(4))
+        b = Pet("b")
+        b.hunger, b.happy, b.energy, b.dirty = a.hunger, a.happy, a.energy, a.dirty
+        start = (a.hunger, a.happy, a.energy, a.dirty)
+        gap = random.randint(0, 300)
+        died = 0 if b.dead() else None
+        for t in range(1, gap + 1):
+            b.tick()
+            if died is None and b.dead():
+                died = t
+        got = a.advance(gap)
+        assert got == died, (i, start, gap, got, died)
+        assert (a.hunger, a.happy, a.energy, a.dirty) == (b.hunger, b.happy, b.energy, b.dirty), (i, start, gap)
+
+
+if __name__ == "__main__":
+    check_against_tick()
+    print("Pet.advance matches tick()")
@@ -0,0 +1,171 @@
+"""
+# sprites_pack.py
+# Asset pipeline that turns the string sprites into packed MONO_VLSB data
+#
+# The sprites in sprites_dog*.py, sprites_death.py and sprites_tools.py are
+# lists of "0"/"1" strings, which are easy to edit by hand but slow to draw:
+# every lit pixel costs one d.pixel() call. This tool packs each sprite into
+# the same MONO_VLSB layout the SSD1306 framebuffer uses and writes them out
+# to sprites_packed.py, so the game can draw a whole sprite with one blit().
+#
+# Regenerate the packed sprites on the host after editing a sprite:
+#     python sprites_pack.py
+# Compare per-frame draw time (needs framebuf, e.g. the micropython unix port):
+#     micropython sprites_pack.py bench
+"""
+
+import sys
+
+# (module, list names) in the order they are written to sprites_packed.py
+SOURCES = (
+    ("sprites_dog", ("DOG_IDLE",)),
+    ("sprites_dog_play", ("DOG_PLAY",)),
+    ("sprites_dog_eat", ("DOG_EAT",)),
+    ("sprites_dog_clean", ("DOG_CLEAN",)),
+    ("sprites_death", ("DEATH_SEQUENCE", "DEATH_GHOST_LOOP")),
+)
+
+ICONS = ("FOOD_ICON", "PLAY_ICON", "CLEAN_ICON")
+
+OUTPUT = "sprites_packed.py"
+
+
+def pack(sprite):
+    """
+    Pack a list of "0"/"1" strings into a MONO_VLSB bytearray.
+    Each byte holds a vertical run of 8 pixels, LSB at the top, and
+    bytes are laid out one page (8 rows) at a time.
+    """
+
+    height = len(sprite)
+    width = len(sprite[0])
+    pages = (height + 7) // 8
+    buf = bytearray(pages * width)
+    for row, line in enumerate(sprite):
+        if len(line) != width:
+            raise ValueError(f"Sprite row {row} is {len(line)} wide, expected {width}")
+        base = (row >> 3) * width
+        bit = 1 << (row & 7)
+        for col, pixel in enumerate(line):
+            if pixel == "1":
+                buf[base + col] |= bit
+    return buf
+
+
+def _frame_names(module):
+    """ Map id() of every single-frame sprite in a module to its variable name """
+
+    names = {}
+    for name in sorted(dir(module)):
+        value = getattr(module, name)
+        if isinstance(value, list) and value and isinstance(value[0], str):
+            names[id(value)] = name
+    return names
+
+
+def _literal(data):
+    return "b'" + "".join("\\x%02x" % b for b in data) + "'"
+
+
+def generate(path=OUTPUT):
+    """ Write the packed sprites module to path """
+
+    out = [
+        "# sprites_packed.py",
+        "# Generated by sprites_pack.py from the string sprites - do not edit by hand.",
+        "# Each sprite is a MONO_VLSB FrameBuffer that can be drawn with a single blit().",
+        "",
+        "import framebuf",
+        "",
+        "",
+        "def _fb(width, height, data):",
+        "    return framebuf.FrameBuffer(bytearray(data), width, height, framebuf.MONO_VLSB)",
+        "",
+    ]
+
+    for modname, lists in SOURCES:
+        module = __import__(modname)
+        names = _frame_names(module)
+        out.append("")
+        out.append(f"# {modname}.py")
+        written = set()
+        for listname in lists:
+            frames = getattr(module, listname)
+            for frame in frames:
+                name = names[id(frame)]
+                if name in written:
+                    continue
+                written.add(name)
+                data = pack(frame)
+                out.append(f"{name} = _fb({len(frame[0])}, {len(frame)}, {_literal(data)})")
+            out.append(f"{listname} = [{', '.join(names[id(f)] for f in frames)}]")
+
+    tools = __import__("sprites_tools")
+    out.append("")
+    out.append("# sprites_tools.py")
+    for name in ICONS:
+        icon = getattr(tools, name)
+        out.append(f"{name} = _fb({len(icon[0])}, {len(icon)}, {_literal(pack(icon))})")
+
+    with open(path, "w") as f:
+        f.write("\n".join(out) + "\n")
+    print(f"Wrote {path}")
+
+
+def benchmark(frames=200):
+    """
+    Time one frame worth of sprite drawing (pet sprite plus the three toolbar
+    icons) using the old per-pixel string walk and the packed blit renderer.
+    """
+
+    import time
+    import framebuf
+    import sprites_packed
+    from sprites_dog import DOG_IDLE
+    from sprites_tools import FOOD_ICON, PLAY_ICON, CLEAN_ICON
+
+    buf = bytearray(128 * 64 // 8)
+    d = framebuf.FrameBuffer(buf, 128, 64, framebuf.MONO_VLSB)
+
+    def draw_strings(x, y, sprite):
+        for row, line in enumerate(sprite):
+            for col, bit in enumerate(line):
+                if bit == "1":
+                    d.pixel(x + col, y + row, 1)
+
+    def draw_packed(x, y, sprite):
+        d.blit(sprite, x, y, 0)
+
+    if hasattr(time, "ticks_us"):
+        now, diff = time.ticks_us, time.ticks_diff
+    else:
+        now, diff = (lambda: int(time.perf_counter() * 1000000)), (lambda a, b: a - b)
+
+    icons = (FOOD_ICON, PLAY_ICON, CLEAN_ICON)
+    packed_icons = (sprites_packed.FOOD_ICON, sprites_packed.PLAY_ICON, sprites_packed.CLEAN_ICON)
+    results = []
+    for label, draw, pet, tools in (
+        ("strings", draw_strings, DOG_IDLE, icons),
+        ("packed", draw_packed, sprites_packed.DOG_IDLE, packed_icons),
+    ):
+        start = now()
+        for i in range(frames):
+            d.fill(0)
+            draw(48, 12, pet[i % len(pet)])
+            for n, icon in enumerate(tools):
+                draw(8 + n * 40, 48, icon)
+        per_frame = diff(now(), start) / frames
+        results.append((label, per_frame, bytes(buf)))
+        print(f"{label:>8}: {per_frame:.1f} us/frame")
+
+    if results[0][2] != results[1][2]:
+        print("WARNING: packed output differs from the string renderer")
+    else:
+        print(f"speedup: {results[0][1] / results[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark()
+    else:
+        generate()
@@ -0,0 +1,46 @@
+# sprites_packed.py
+# Generated by sprites_pack.py from the string sprites - do not edit by hand.
+# Each sprite is a MONO_VLSB FrameBuffer that can be drawn with a single blit().
+
+import framebuf
+
+
+def _fb(width, height, data):
+    return framebuf.FrameBuffer(bytearray(data), width, height, framebuf.MONO_VLSB)
+
+
+# sprites_dog.py
+DOG_IDLE_0 = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x70\xf8\x3c\xdc\xf8\x3c\xfc\xfc\x3c\xf8\xdc\x3c\xf8\x70\x00\x80\x80\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x07\x0f\x0d\xed\xef\x37\xfb\x3e\xfc\xf8\xf8\xf8\xf9\xff\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06\x07\x07\x00\x07\x06\x01\x03\x03\x03\x01\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_IDLE_1 = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x38\x7c\x1e\xee\xfc\x9e\xfe\xfe\x9e\xfc\xee\x1e\x7c\x38\x00\xc0\xc0\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03\x07\x06\xf6\xf7\x7b\xfd\x7e\xfe\xfe\xfe\xfc\xfd\x7f\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06\x07\x07\x00\x07\x06\x00\x01\x01\x01\x00\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_IDLE = [DOG_IDLE_0, DOG_IDLE_1]
+
+# sprites_dog_play.py
+idle_with_ball = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x70\xf8\x3c\xdc\xf8\x3c\xfc\xfc\x3c\xf8\xdc\x3c\xf8\x70\x00\x80\x80\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xc0\x60\xa0\x60\xc3\x07\x0f\x0d\xed\xef\x37\xfb\x3e\xfc\xf8\xf8\xf8\xf9\xff\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03\x02\x03\x01\x00\x00\x06\x07\x07\x00\x07\x06\x01\x07\x07\x07\x01\x06\x07\x07\x00\x00\x00\x00\x00')
+dog_play_jump = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1c\x3e\x0f\xf7\xfe\xcf\x7f\x7f\xcf\xfe\xf7\x0f\x3e\x1c\x00\x00\x80\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xc0\x60\xa0\x60\xc0\x01\x03\xc3\xfb\xfd\x9e\xff\xff\x7e\x7c\xfc\xfc\xf8\xff\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03\x02\x03\x01\x00\x00\x00\x00\x00\x01\x01\x01\x00\x06\x07\x07\x00\x06\x07\x07\x00\x00\x00\x00\x00')
+no_ball_play_dog = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1c\x3e\x0f\xf7\xfe\xcf\x7f\x7f\xcf\xfe\xf7\x0f\x3e\x1c\x00\x00\x80\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03\xc3\xfb\xfd\x9e\xff\xff\x7e\x7c\xfc\xfc\xf8\xff\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x00\x06\x07\x07\x00\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_PLAY = [idle_with_ball, dog_play_jump, idle_with_ball, no_ball_play_dog]
+
+# sprites_dog_eat.py
+DOG_EAT_IDLE = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x70\xf8\x3c\xdc\xf8\x3c\xfc\xfc\x3c\xf8\xdc\x3c\xf8\x70\x00\x80\x80\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x07\x0f\x0d\xed\xef\x37\xfb\x3e\xfc\xf8\xf8\xf8\xf9\xff\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06\x07\x07\x07\x07\x06\x00\x00\x00\x06\x07\x07\x00\x07\x06\x01\x03\x03\x03\x01\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_EAT_BREATH = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x38\x7c\x1e\xee\xfc\x9e\xfe\xfe\x9e\xfc\xee\x1e\x7c\x38\x00\xc0\xc0\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03\x07\x06\xf6\xf7\x7b\xfd\x7e\xfe\xfe\xfe\xfc\xfd\x7f\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x06\x07\x07\x07\x07\x07\x06\x00\x00\x00\x06\x07\x07\x00\x07\x06\x00\x01\x01\x01\x00\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_EAT = [DOG_EAT_IDLE, DOG_EAT_BREATH]
+
+# sprites_dog_clean.py
+DOG_CLEAN_IDLE = _fb(32, 32, b'\x00\x00\x20\x50\x20\x00\x00\x00\x00\x0c\x12\x16\x0c\x00\x00\x00\x00\x00\x00\x00\x78\x84\xa4\x8c\x94\x78\x00\x00\x00\x00\x00\x00\x00\x00\x00\x40\xa0\x40\x00\x70\xf8\x3c\xdc\xf8\x3c\xfc\xfc\x3c\xf8\xdc\x3c\xf8\x70\x00\x88\x94\x88\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x07\x0f\x0d\xed\xef\x37\xfb\x3e\xfc\xf8\xf8\xf8\xf9\xff\xff\x80\x00\x02\x05\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06\x07\x07\x00\x07\x06\x01\x03\x03\x03\x01\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_CLEAN_BREATH = _fb(32, 32, b'\x00\x20\x50\x20\x00\x00\x00\x00\x0c\x12\x12\x0c\x00\x00\x00\x00\x00\x00\x00\x00\x00\x3c\x42\x52\x46\x4a\x3c\x00\x00\x00\x00\x00\x00\x00\x40\xa0\x40\x00\x00\x38\x7c\x1e\xee\xfc\x9e\xfe\xfe\x9e\xfc\xee\x1e\x7c\x38\x00\xc0\xc4\x8a\x04\x00\x00\x00\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03\x07\x06\xf6\xf7\x7b\xfd\x7e\xfe\xfe\xfe\xfc\xfd\x7f\xff\x80\x00\x00\x01\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06\x07\x07\x00\x07\x06\x00\x01\x01\x01\x00\x06\x07\x07\x00\x00\x00\x00\x00')
+DOG_CLEAN = [DOG_CLEAN_IDLE, DOG_CLEAN_BREATH]
+
+# sprites_death.py
+START_BLOW = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x08\x1c\x3e\x1c\x08\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+BLOWUP = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\x00\x00\x00\xc0\x00\x00\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x08\x88\x49\x2a\x1c\xff\x1c\x2a\x49\x88\x08\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+SKULL = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06\x0f\x19\x78\x3c\x6f\x3c\x78\x19\x0f\x06\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+RIP = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe0\x70\x70\xf0\xf0\x70\xf0\x70\x70\xf0\xe0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\xff\xf8\xfd\xfa\xff\xf8\xff\xf8\xfd\xfe\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x00\x00\x00\x00\x00\x00\x00')
+DEATH_SEQUENCE = [START_BLOW, BLOWUP, SKULL, RIP]
+RIP_GHOST = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf0\x08\x84\x14\x84\x14\x88\x70\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe0\x70\x70\xf0\xf0\x71\xf0\x71\x70\xf1\xe0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\xff\xf8\xfd\xfa\xff\xf8\xff\xf8\xfd\xfe\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x00\x00\x00\x00\x00\x00\x00')
+RIP_GHOST_BREATH = _fb(32, 32, b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe0\x10\x08\x28\x08\x28\x10\xe0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe0\x70\x70\xf0\xf0\x71\xf2\x71\x72\xf1\xe2\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\xff\xf8\xfd\xfa\xff\xf8\xff\xf8\xfd\xfe\xff\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x00\x00\x00\x00\x00\x00\x00')
+DEATH_GHOST_LOOP = [RIP_GHOST, RIP_GHOST_BREATH]
+
+# sprites_tools.py
+FOOD_ICON = _fb(8, 8, b'\x07\x08\xff\x08\x07\x00\x0f\xff')
+PLAY_ICON = _fb(8, 8, b'\x3c\x66\xe7\x99\x99\xe7\x66\x3c')
+CLEAN_ICON = _fb(8, 8, b'\x38\x44\x82\x81\xa2\x54\x38\x00')
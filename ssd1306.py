@@ -28,12 +28,24 @@ SET_CHARGE_PUMP = const(0x8D)
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
+    # bytes on the bus per write_cmd() and per write_data() besides the data itself
+    CMD_BYTES = 1
+    DATA_OVERHEAD = 0
+
     def __init__(self, width, height, external_vcc):
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        # copy of what the panel currently shows, used by show() to send only changes
+        self.shadow = bytearray(self.pages * self.width)
+        self.bufview = memoryview(self.buffer)
+        # bus accounting: bytes on the wire (commands, data and the bus framing
+        # around them) sent by the last show() and in total
+        self.frame_bytes = 0
+        self.total_bytes = 0
+        self.frames = 0
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -72,7 +84,7 @@ class SSD1306(framebuf.FrameBuffer):
         ):  # on
             self.write_cmd(cmd)
         self.fill(0)
-        self.show()
+        self.show(full=True)
 
     def poweroff(self):
         self.write_cmd(SET_DISP | 0x00)
@@ -87,23 +99,59 @@ class SSD1306(framebuf.FrameBuffer):
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def show(self, full=False):
+        """
+        Send the framebuffer to the panel. Only the column span that changed
+        in each page since the last show() is transmitted, unless full is set
+        (e.g. after the panel was reset or powered down).
+        """
+        width = self.width
+        buf = self.buffer
+        shadow = self.shadow
+        sent = 0
+        if full:
+            sent = self._send_window(0, width - 1, 0, self.pages - 1, 0, len(buf))
+            shadow[:] = buf
+        else:
+            for page in range(self.pages):
+                start = page * width
+                end = start + width
+                # find the first and last changed column without slicing
+                lo = start
+                while lo < end and buf[lo] == shadow[lo]:
+                    lo += 1
+                if lo == end:
+                    continue
+                hi = end - 1
+                while buf[hi] == shadow[hi]:
+                    hi -= 1
+                sent += self._send_window(lo - start, hi - start, page, page, lo, hi + 1)
+                shadow[lo:hi + 1] = self.bufview[lo:hi + 1]
+        self.frame_bytes = sent
+        self.total_bytes += sent
+        self.frames += 1
+
+    def _send_window(self, col0, col1, page0, page1, start, end):
+        """ Write buffer[start:end] into the given column/page window, return bytes sent """
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
-            x0 += 32
-            x1 += 32
+            col0 += 32
+            col1 += 32
         self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
+        self.write_cmd(col0)
+        self.write_cmd(col1)
         self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+        self.write_data(self.bufview[start:end])
+        return 6 * self.CMD_BYTES + self.DATA_OVERHEAD + end - start
 
 
 class SSD1306_I2C(SSD1306):
+    # address + control byte + command; address + 0x40 control byte before data
+    CMD_BYTES = 3
+    DATA_OVERHEAD = 2
+
     def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
         self.i2c = i2c
         self.addr = addr
@@ -1,21 +1,50 @@
-import time
 from Button import Button
 from pet import Pet
 from StateModel import StateModel
-from sprites_dog import DOG_IDLE
-from sprites_tools import FOOD_ICON, PLAY_ICON, CLEAN_ICON
-from sprites_dog_play import DOG_PLAY
-from sprites_dog_eat import DOG_EAT
-from sprites_dog_clean import DOG_CLEAN
-from sprites_death import DEATH_SEQUENCE, DEATH_GHOST_LOOP
-
-# Logical states for StateModel (used only for tracking, not for driving buttons)
+from Compositor import Compositor, Layer
+from Animation import Animation, AnimationEngine
+from Clock import SYSTEM_CLOCK
+from EventQueue import EventQueue
+from Log import Log
+# Packed MONO_VLSB sprites - regenerate with sprites_pack.py after editing sprites_*.py
+from sprites_packed import (
+    DOG_IDLE, DOG_PLAY, DOG_EAT, DOG_CLEAN,
+    DEATH_SEQUENCE, DEATH_GHOST_LOOP,
+    FOOD_ICON, PLAY_ICON, CLEAN_ICON,
+)
+
+# States of the game's StateModel. Buttons still go through TamaInputHandler,
+# which turns them into the custom events of the transition table below.
 STATE_IDLE = 0
 STATE_PLAYING = 1
 STATE_EATING = 2
 STATE_CLEANING = 3
 STATE_DEAD = 4
 
+# Frame intervals in ms
+IDLE_INTERVAL = 200
+PLAY_INTERVAL = 160
+EAT_INTERVAL = 180
+CLEAN_INTERVAL = 180
+DEATH_INTERVAL = 250
+
+# Button/PIR edges that can wait between two drains of the event queue
+INPUT_QUEUE_SIZE = 32
+FRAME_INTERVAL = 30
+
+PET_TICK_INTERVAL = 1000
+
+# (tone, ms) pairs, 0 is a rest
+HAPPY_JINGLE = ((1200, 150), (0, 80), (1500, 150), (0, 80), (1800, 150), (0, 80))
+
+
+def _asyncio():
+    try:
+        import uasyncio as asyncio
+    except ImportError:
+        import asyncio
+    return asyncio
+
 
 class TamaInputHandler:
     def __init__(self, game, buzzer):
@@ -24,10 +53,8 @@ class TamaInputHandler:
 
     def buttonPressed(self, name):
         g = self.game
-        try:
-            print("buttonPressed called with:", name)
-        except:
-            pass
+        g.mark_input()
+        Log.d('buttonPressed called with: %s', name)
 
         # If the pet is dead, use feed+clean combo to revive
         if g.is_dead:
@@ -43,11 +70,11 @@ class TamaInputHandler:
         # Normal controls when alive
         if name == "feed":
             g.selected = (g.selected - 1) % len(g.menu_items)
-            self.buzzer.beep(tone=500)
+            g.beep(500)
 
         elif name == "clean":
             g.selected = (g.selected + 1) % len(g.menu_items)
-            self.buzzer.beep(tone=500)
+            g.beep(500)
 
         elif name == "play":
             current = g.menu_items[g.selected]
@@ -60,6 +87,7 @@ class TamaInputHandler:
 
     def buttonReleased(self, name):
         g = self.game
+        g.mark_input()
         if name == "feed":
             g.left_down = False
         elif name == "clean":
@@ -67,35 +95,72 @@ class TamaInputHandler:
 
 
 class TamaDisplay:
+    PET_X = 48
+    PET_Y = 12
+
     def __init__(self, game):
         self.game = game
 
+        # Layers, bottom to top. Each one is only redrawn when its key changes.
+        c = Compositor(game.d)
+        self.compositor = c
+        c.addLayer(Layer("name", 0, 0, 80, 8, self.draw_name, self.name_key))
+        c.addLayer(Layer("mood", 80, 0, 48, 8, self.draw_mood, self.mood_key))
+        # Sprites are 32x32 but their bottom rows are blank; 28 rows keeps the
+        # pet clear of the stat hint so a stat change doesn't redraw the pet.
+        c.addLayer(Layer("pet", self.PET_X, self.PET_Y, 32, 28, self.draw_pet_layer, self.current_sprite))
+        c.addLayer(Layer("hint", 0, 40, 128, 8, self.draw_stat_hint, self.hint_key))
+        c.addLayer(Layer("toolbar", 0, 48, 128, 16, self.draw_toolbar, self.toolbar_key))
+        # Game over overlay covers the hint and toolbar while the pet is dead
+        c.addLayer(Layer("overlay", 0, 40, 128, 24, self.draw_overlay, self.overlay_key))
+
     def draw_sprite(self, x, y, sprite):
-        g = self.game
-        d = g.d
-        for row, line in enumerate(sprite):
-            for col, bit in enumerate(line):
-                if bit == "1":
-                    d.pixel(x + col, y + row, 1)
+        # key=0 keeps the old behaviour of only drawing the lit pixels
+        self.game.d.blit(sprite, x, y, 0)
 
     def draw_icon(self, x, y, icon):
+        self.game.d.blit(icon, x, y, 0)
+
+    # ======= Layer keys =======
+
+    def name_key(self):
+        return self.game.pet.name
+
+    def mood_key(self):
+        return self.game.pet.mood()
+
+    def hint_key(self):
         g = self.game
-        d = g.d
-        for row, line in enumerate(icon):
-            for col, pixel in enumerate(line):
-                if pixel == "1":
-                    d.pixel(x + col, y + row, 1)
+        if g.is_dead:
+            return None
+        item = g.menu_items[g.selected]
+        if item == "food":
+            return g.pet.hunger
+        elif item == "play":
+            return g.pet.happy + 1000
+        return g.pet.dirty + 2000
 
-    def draw_toolbar(self):
+    def toolbar_key(self):
         g = self.game
-        d = g.d
-        y = 48
-        d.fill_rect(0, y, 128, 16, 0)
+        return None if g.is_dead else g.selected
+
+    def overlay_key(self):
+        return True if self.game.is_dead else None
 
+    # ======= Layer renderers =======
+
+    def draw_name(self, layer):
+        self.game.d.text(self.game.pet.name, layer.x, layer.y, 1)
+
+    def draw_mood(self, layer):
+        self.game.d.text(self.game.pet.mood(), layer.x, layer.y, 1)
+
+    def draw_toolbar(self, layer):
+        g = self.game
+        d = g.d
         if g.is_dead:
-            d.text("Game Over", 0, y, 1)
-            d.text("Hold L+R", 0, y + 8, 1)
             return
+        y = layer.y
 
         for i, item in enumerate(g.menu_items):
             x = 8 + i * 40
@@ -113,14 +178,12 @@ class TamaDisplay:
 
             self.draw_icon(x, y, icon)
 
-    def draw_stat_hint(self):
+    def draw_stat_hint(self, layer):
         g = self.game
         d = g.d
-        y = 40
-        d.fill_rect(0, y, 128, 8, 0)
         if g.is_dead:
-            d.text("RIP", 0, y, 1)
             return
+        y = layer.y
 
         item = g.menu_items[g.selected]
         if item == "food":
@@ -130,46 +193,33 @@ class TamaDisplay:
         elif item == "clean":
             d.text("Dirty:{}".format(g.pet.dirty), 0, y, 1)
 
-    def draw_pet(self, x, y):
+    def draw_overlay(self, layer):
         g = self.game
         d = g.d
-
-        if g.is_dead:
-            if g.death_index < len(DEATH_SEQUENCE):
-                sprite = DEATH_SEQUENCE[g.death_index]
-            else:
-                loop_idx = (g.death_index - len(DEATH_SEQUENCE)) % len(DEATH_GHOST_LOOP)
-                sprite = DEATH_GHOST_LOOP[loop_idx]
-            d.fill_rect(x, y, 32, 32, 0)
-            self.draw_sprite(x, y, sprite)
+        if not g.is_dead:
             return
+        y = layer.y
+        d.text("RIP", 0, y, 1)
+        d.text("Game Over", 0, y + 8, 1)
+        d.text("Hold L+R", 0, y + 16, 1)
 
-        if g.is_playing:
-            sprite = DOG_PLAY[g.play_index]
-        elif g.is_eating:
-            sprite = DOG_EAT[g.eat_index]
-        elif g.is_cleaning:
-            sprite = DOG_CLEAN[g.clean_index]
-        else:
-            sprite = DOG_IDLE[g.frame]
+    def current_sprite(self):
+        return self.game.shown_anim().frame()
 
-        d.fill_rect(x, y, 32, 32, 0)
-        self.draw_sprite(x, y, sprite)
+    def draw_pet_layer(self, layer):
+        self.draw_sprite(layer.x, layer.y, self.current_sprite())
 
     def draw(self):
-        g = self.game
-        d = g.d
-        d.fill(0)
-        d.text(g.pet.name, 0, 0, 1)
-        d.text(g.pet.mood(), 80, 0, 1)
-        self.draw_pet(48, 12)
-        self.draw_stat_hint()
-        self.draw_toolbar()
-        d.show()
+        """ Merge the layers that changed into the display and flush it """
+        return self.compositor.update()
 
 
 class TamaGame:
-    def __init__(self, display, buzzer, feed_pin, play_pin, clean_pin, pir_sensor=None):
+    def __init__(self, display, buzzer, feed_pin, play_pin, clean_pin, pir_sensor=None, clock=None, save=None):
+        # clock is SYSTEM_CLOCK on the device; pass a VirtualClock to simulate
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        # SaveState, attached once the saved pet has been restored below
+        self.save = None
         self.d = display
         self.buzzer = buzzer
         self.pet = Pet("Mochi")
@@ -177,39 +227,55 @@ class TamaGame:
         self.menu_items = ["food", "play", "clean"]
         self.selected = 0
 
-        # idle frame
-        self.frame = 0
-        self.last_anim = time.ticks_ms()
-        self.last_tick = time.ticks_ms()
-
-        # play animation
-        self.is_playing = False
-        self.play_index = 0
-        self.last_play_frame = time.ticks_ms()
-
-        # eat animation
-        self.is_eating = False
-        self.eat_index = 0
-        self.eat_loops = 0
-        self.last_eat_frame = time.ticks_ms()
-
-        # clean animation
-        self.is_cleaning = False
-        self.clean_index = 0
-        self.clean_loops = 0
-        self.last_clean_frame = time.ticks_ms()
+        self.last_tick = self.clock.ticks_ms()
+
+        # animations, all advanced by one engine
+        self.anim = AnimationEngine(handler=self, clock=self.clock)
+        self.idle_anim = Animation("idle", DOG_IDLE, IDLE_INTERVAL)
+        self.play_anim = Animation("play", DOG_PLAY, PLAY_INTERVAL, loops=1, on_finish="anim_done")
+        self.eat_anim = Animation("eat", DOG_EAT, EAT_INTERVAL, loops=2, on_finish="anim_done")
+        self.clean_anim = Animation("clean", DOG_CLEAN, CLEAN_INTERVAL, loops=3, on_finish="anim_done")
+        self.ghost_anim = Animation("ghost", DEATH_GHOST_LOOP, DEATH_INTERVAL)
+        self.death_anim = Animation("death", DEATH_SEQUENCE, DEATH_INTERVAL, loops=1, follow=self.ghost_anim)
+        # position in this tuple is the animation id stored in save records
+        self.anims = (self.idle_anim, self.play_anim, self.eat_anim, self.clean_anim,
+                      self.death_anim, self.ghost_anim)
+        # the play/eat/clean animation currently running, if any
+        self.action = None
 
         # death / revive
-        self.is_dead = False
         self.zero_since = None
-        self.death_index = 0
-        self.death_last_frame = time.ticks_ms()
         self.left_down = False
         self.right_down = False
 
+        # render gating: last drawn fingerprint and frame counters
+        self.last_render = None
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+        # asyncio run mode (set up by run_async)
+        self._asyncio = None
+        self._render_event = None
+        self._anim_event = None
+        self._buzzer_event = None
+        self._input_flag = None
+        self.input_pending = False
+
+        # input-to-frame latency in ms, for the last input and the worst seen
+        self.input_time = None
+        self.input_latency = 0
+        self.input_latency_max = 0
+
+        # Button and PIR interrupts only queue their edges here;
+        # the handlers run when the main loop drains the queue
+        self.events = EventQueue(INPUT_QUEUE_SIZE)
+
         # PIR sensor
         self.pir_sensor = pir_sensor
         if self.pir_sensor is not None:
+            # timestamp PIR edges on the game clock, like the buttons
+            self.pir_sensor.setClock(self.clock)
+            self.pir_sensor.setQueue(self.events)
             self.pir_sensor.setHandler(self)
 
         # Helper classes
@@ -217,40 +283,113 @@ class TamaGame:
         self.display = TamaDisplay(self)
 
         # Buttons wired to TamaInputHandler (WORKING PATH)
-        self.feed_button = Button(pin=feed_pin, name="feed", handler=self.input_handler)
-        self.play_button = Button(pin=play_pin, name="play", handler=self.input_handler)
-        self.clean_button = Button(pin=clean_pin, name="clean", handler=self.input_handler)
-
-        # --- StateModel integration (tracking only, doesn't own buttons) ---
-        self.state_model = StateModel(5, handler=self, debug=False)
+        self.feed_button = Button(pin=feed_pin, name="feed", handler=self.input_handler, clock=self.clock, queue=self.events)
+        self.play_button = Button(pin=play_pin, name="play", handler=self.input_handler, clock=self.clock, queue=self.events)
+        self.clean_button = Button(pin=clean_pin, name="clean", handler=self.input_handler, clock=self.clock, queue=self.events)
+
+        # --- StateModel: owns the idle/action/dead state, not the buttons ---
+        # Per state: (entry action, once-a-second update, animation on screen).
+        # update and shown_anim do one lookup here instead of testing flags.
+        self.state_handlers = (
+            (self._enter_idle, self._update_alive, self._shown_idle),
+            (self._enter_action, self._update_alive, self._shown_action),
+            (self._enter_action, self._update_alive, self._shown_action),
+            (self._enter_action, self._update_alive, self._shown_action),
+            (self._enter_dead, self._update_dead, self._shown_dead),
+        )
+        self.state_anims = (None, self.play_anim, self.eat_anim, self.clean_anim, None)
         self.current_state = STATE_IDLE
-        self.state_model.start()
-
-    # ======= StateModel handler methods (minimal) =======
+        self._shown = self._shown_idle
+
+        model = StateModel(5, handler=self, debug=False)
+        self.state_model = model
+        self.ev_start_play = model.addCustomEvent("start_play")
+        self.ev_start_eat = model.addCustomEvent("start_eat")
+        self.ev_start_clean = model.addCustomEvent("start_clean")
+        self.ev_anim_done = model.addCustomEvent("anim_done")
+        self.ev_died = model.addCustomEvent("died")
+        self.ev_revive = model.addCustomEvent("revive")
+        start_action = [("start_play", STATE_PLAYING), ("start_eat", STATE_EATING),
+                        ("start_clean", STATE_CLEANING), ("died", STATE_DEAD)]
+        model.setTransitionTable([
+            start_action,                                   # STATE_IDLE
+            start_action + [("anim_done", STATE_IDLE)],     # STATE_PLAYING
+            start_action + [("anim_done", STATE_IDLE)],     # STATE_EATING
+            start_action + [("anim_done", STATE_IDLE)],     # STATE_CLEANING
+            [("revive", STATE_IDLE)],                       # STATE_DEAD
+        ])
+        model.start()
+
+        if save is not None:
+            self.load_state(save)
+            self.save = save
+
+    # ======= StateModel handler methods =======
 
     def stateEntered(self, state, event):
-        # We already set flags in start_* methods; no extra work needed here.
-        # This exists so we are a valid StateModel handler for the assignment.
-        pass
+        self.current_state = state
+        handlers = self.state_handlers[state]
+        self._shown = handlers[2]
+        handlers[0](state)
+        self.save_state()
 
     def stateLeft(self, state, event):
         pass
 
     def stateEvent(self, state, event):
-        # We are not using event-driven transitions right now.
         return False
 
     def stateDo(self, state):
-        # We are not using stateModel.run(), so this is unused.
+        """ The once-a-second update of the state (the pet tick) """
+        self.state_handlers[state][1]()
+
+    @property
+    def is_dead(self):
+        return self.current_state == STATE_DEAD
+
+    # ======= Per-state handlers =======
+
+    def _enter_idle(self, state):
+        self._stop_action()
+        self.anim.stop(self.death_anim)
+        self.anim.stop(self.ghost_anim)
+        if not self.idle_anim.active:
+            self.anim.start(self.idle_anim, self.clock.ticks_ms())
+            self._wake_anim()
+
+    def _enter_action(self, state):
+        self._start_action(self.state_anims[state])
+
+    def _enter_dead(self, state):
+        self._stop_action()
+        self.anim.stop(self.idle_anim)
+        self.anim.start(self.death_anim, self.clock.ticks_ms())
+        self._wake_anim()
+
+    def _update_alive(self):
+        self.pet.tick()
+        self.check_death_condition()
+
+    def _update_dead(self):
         pass
 
+    def _shown_idle(self):
+        return self.idle_anim
+
+    def _shown_action(self):
+        return self.action
+
+    def _shown_dead(self):
+        return self.death_anim if self.death_anim.active else self.ghost_anim
+
     # ======= Sensor callbacks (for PIR) =======
 
     def sensorTripped(self, name):
         if name == "PIR":
+            self.mark_input()
             if self.is_dead:
                 return
-            if not (self.is_playing or self.is_eating or self.is_cleaning):
+            if self.action is None:
                 self.play_happy_jingle()
                 if self.pet.happy < 10:
                     self.pet.happy += 1
@@ -265,15 +404,7 @@ class TamaGame:
         old_name = self.pet.name
         self.pet = Pet(old_name)
 
-        self.is_dead = False
         self.zero_since = None
-        self.death_index = 0
-        self.death_last_frame = time.ticks_ms()
-
-        self.is_playing = False
-        self.is_eating = False
-        self.is_cleaning = False
-
         self.left_down = False
         self.right_down = False
 
@@ -283,145 +414,333 @@ class TamaGame:
         self.pet.energy = 80
         self.pet.dirty = 0
 
-        # update logical state
-        self.current_state = STATE_IDLE
-        self.state_model.gotoState(STATE_IDLE, "revive_combo")
+        self.state_model.processEvent(self.ev_revive)
 
     def start_play_animation(self):
         if self.is_dead:
             return
-        self.is_playing = True
-        self.is_eating = False
-        self.is_cleaning = False
-        self.play_index = 0
-        self.last_play_frame = time.ticks_ms()
-        self.buzzer.beep(tone=1000)
-
-        self.current_state = STATE_PLAYING
-        self.state_model.gotoState(STATE_PLAYING, "start_play")
+        self.state_model.processEvent(self.ev_start_play)
+        self.beep(1000)
 
     def start_eat_animation(self):
         if self.is_dead:
             return
         self.pet.feed()
-        self.is_eating = True
-        self.is_playing = False
-        self.is_cleaning = False
-        self.eat_index = 0
-        self.eat_loops = 0
-        self.last_eat_frame = time.ticks_ms()
-        self.buzzer.beep(tone=750)
-
-        self.current_state = STATE_EATING
-        self.state_model.gotoState(STATE_EATING, "start_eat")
+        self.state_model.processEvent(self.ev_start_eat)
+        self.beep(750)
 
     def start_clean_animation(self):
         if self.is_dead:
             return
         self.pet.clean()
-        self.is_cleaning = True
-        self.is_playing = False
-        self.is_eating = False
-        self.clean_index = 0
-        self.clean_loops = 0
-        self.last_clean_frame = time.ticks_ms()
-        self.buzzer.beep(tone=600)
-
-        self.current_state = STATE_CLEANING
-        self.state_model.gotoState(STATE_CLEANING, "start_clean")
+        self.state_model.processEvent(self.ev_start_clean)
+        self.beep(600)
+
+    def _start_action(self, anim):
+        if self.action is not None and self.action is not anim:
+            self.anim.stop(self.action)
+        self.action = anim
+        self.anim.start(anim, self.clock.ticks_ms())
+        self._wake_anim()
+
+    def _stop_action(self):
+        if self.action is not None:
+            self.anim.stop(self.action)
+            self.action = None
+
+    def animationFinished(self, anim, event):
+        """ AnimationEngine callback - sends the animation's on_finish event to the state model """
+        if anim is self.action:
+            self.action = None
+            self.state_model.processEvent(event if event is not None else self.ev_anim_done)
+
+    def shown_anim(self):
+        """ The animation whose frame is on screen """
+        return self._shown()
+
+    def beep(self, tone):
+        self.buzzer.beep(tone=tone)
+        self._wake_buzzer()
 
     def play_happy_jingle(self):
-        for tone in (1200, 1500, 1800):
-            self.buzzer.beep(tone=tone)
-            time.sleep_ms(80)
+        self.buzzer.playMelody(HAPPY_JINGLE)
+        self._wake_buzzer()
+
+    def mark_input(self):
+        """ Called for every button/sensor event, starts the input-to-frame latency clock """
+        self.input_pending = True
+        if self.input_time is None:
+            # measure from the interrupt, not from when the queue was drained
+            t = self.events.eventTime
+            self.input_time = t if t is not None else self.clock.ticks_ms()
 
     def check_death_condition(self):
         if self.is_dead:
             return
-        if (
-            self.pet.hunger == 0
-            and self.pet.happy == 0
-            and self.pet.energy == 0
-            and self.pet.dirty == 100
-        ):
-            now = time.ticks_ms()
+        if self.pet.dead():
+            now = self.clock.ticks_ms()
             if self.zero_since is None:
                 self.zero_since = now
             else:
-                if time.ticks_diff(now, self.zero_since) >= 5:
+                if self.clock.ticks_diff(now, self.zero_since) >= 5:
                     self.start_death_animation()
         else:
             self.zero_since = None
 
+    def catch_up(self, seconds):
+        """
+        Fast-forward the pet over seconds of missed ticks (after a power
+        cycle or a long sleep) in constant time, including dying.
+        """
+        if self.is_dead or seconds <= 0:
+            return
+        died = self.pet.advance(seconds)
+        if died is None:
+            self.zero_since = None
+        elif died < seconds:
+            # the condition held on the following tick too
+            self.start_death_animation()
+        else:
+            self.zero_since = self.clock.ticks_ms()
+
     def start_death_animation(self):
-        self.is_dead = True
-        self.is_playing = False
-        self.is_eating = False
-        self.is_cleaning = False
-        self.death_index = 0
-        self.death_last_frame = time.ticks_ms()
+        self.state_model.processEvent(self.ev_died)
 
-        self.current_state = STATE_DEAD
-        self.state_model.gotoState(STATE_DEAD, "stats_zero")
+    def update_input(self):
+        """ Run the handlers for every button/sensor edge queued since the last call """
+        self.events.drain()
 
     def update_pet(self):
-        now = time.ticks_ms()
-        if time.ticks_diff(now, self.last_tick) >= 1000:
+        now = self.clock.ticks_ms()
+        if self.clock.ticks_diff(now, self.last_tick) >= PET_TICK_INTERVAL:
             self.last_tick = now
-            if not self.is_dead:
-                self.pet.tick()
-            self.check_death_condition()
+            self.tick_pet()
 
-    def update_anim(self):
-        now = time.ticks_ms()
+    def tick_pet(self):
+        self.stateDo(self.current_state)
+        self.save_state()
 
-        if self.is_dead:
-            if time.ticks_diff(now, self.death_last_frame) >= 250:
-                self.death_last_frame = now
-                self.death_index += 1
+    # ======= Save / restore =======
+
+    def save_state(self, force=False):
+        """ Hand the pet to the SaveState, which decides whether to write it """
+        if self.save is None:
             return
+        p = self.pet
+        state = self.current_state
+        if state == STATE_DEAD:
+            anim = self.anims.index(self.shown_anim())
+        else:
+            # play/eat/clean resume as idle anyway, so entering and leaving
+            # them is not worth an immediate write; their stat changes are
+            # coalesced like any other tick
+            state = STATE_IDLE
+            anim = self.anims.index(self.idle_anim)
+        self.save.save(p.name, p.hunger, p.happy, p.energy, p.dirty,
+                       state, anim, self.selected, force)
+
+    def load_state(self, save):
+        """ Restore the newest saved pet and catch up on the time spent off """
+        rec = save.load()
+        if rec is None:
+            return False
+        p = self.pet
+        p.name = rec.name
+        p.hunger, p.happy, p.energy, p.dirty = rec.hunger, rec.happy, rec.energy, rec.dirty
+        self.selected = rec.selected % len(self.menu_items)
+        if rec.state == STATE_DEAD:
+            self.start_death_animation()
+            if rec.anim == self.anims.index(self.ghost_anim):
+                # it already died before the reset, skip the death sequence
+                self.anim.stop(self.death_anim)
+                self.anim.start(self.ghost_anim, self.clock.ticks_ms())
+        else:
+            # an interrupted play/eat/clean already changed the stats, so resume idle
+            self.catch_up(self.clock.time() - rec.time)
+        return True
 
-        if time.ticks_diff(now, self.last_anim) >= 200:
-            self.last_anim = now
-            self.frame = (self.frame + 1) % len(DOG_IDLE)
-
-        if self.is_playing and time.ticks_diff(now, self.last_play_frame) >= 160:
-            self.last_play_frame = now
-            self.play_index = (self.play_index + 1) % len(DOG_PLAY)
-            if self.play_index == 0:
-                self.is_playing = False
-                # one-shot transition back to idle
-                self.current_state = STATE_IDLE
-                self.state_model.gotoState(STATE_IDLE, "anim_done_play")
-
-        if self.is_eating and time.ticks_diff(now, self.last_eat_frame) >= 180:
-            self.last_eat_frame = now
-            self.eat_index = (self.eat_index + 1) % len(DOG_EAT)
-            if self.eat_index == 0:
-                self.eat_loops += 1
-                if self.eat_loops >= 2:
-                    self.is_eating = False
-                    self.eat_loops = 0
-                    self.current_state = STATE_IDLE
-                    self.state_model.gotoState(STATE_IDLE, "anim_done_eat")
-
-        if self.is_cleaning and time.ticks_diff(now, self.last_clean_frame) >= 180:
-            self.last_clean_frame = now
-            self.clean_index = (self.clean_index + 1) % len(DOG_CLEAN)
-            if self.clean_index == 0:
-                self.clean_loops += 1
-                if self.clean_loops >= 3:
-                    self.is_cleaning = False
-                    self.clean_loops = 0
-                    self.current_state = STATE_IDLE
-                    self.state_model.gotoState(STATE_IDLE, "anim_done_clean")
+    def update_anim(self):
+        if self.anim.update(self.clock.ticks_ms()):
+            self.request_render()
+
+    def next_deadline(self):
+        """ ms until the next pet tick or animation frame is due """
+        clock = self.clock
+        now = clock.ticks_ms()
+        due = PET_TICK_INTERVAL - clock.ticks_diff(now, self.last_tick)
+        anim_due = self.anim.next_due(now)
+        if 0 <= anim_due < due:
+            due = anim_due
+        return due if due > 0 else 0
+
+    def simulate(self, duration_ms, render=False):
+        """
+        Run update_pet/update_anim for duration_ms of game time. Instead of
+        the 30 ms polling sleep, the clock sleeps straight to the next pet
+        tick or animation frame, so with a VirtualClock a full day of pet
+        life runs in seconds. Rendering is skipped unless render is True.
+        """
+        clock = self.clock
+        end = clock.ticks_add(clock.ticks_ms(), duration_ms)
+        while True:
+            due = self.next_deadline()
+            left = clock.ticks_diff(end, clock.ticks_ms())
+            if due > left:
+                clock.sleep_ms(left)
+                break
+            clock.sleep_ms(due)
+            self.update_input()
+            self.update_pet()
+            self.update_anim()
+            self.buzzer.update()
+            if render:
+                self.draw()
+
+    def render_state(self):
+        """
+        Cheap fingerprint of everything the screen depends on. Mood and the
+        stat hint are derived from the pet stats, so they are covered too.
+        """
+        p = self.pet
+        return (
+            p.name, p.hunger, p.happy, p.energy, p.dirty,
+            self.selected, self.is_dead,
+            self.shown_anim().frame(),
+        )
 
     def draw(self):
+        state = self.render_state()
+        if state == self.last_render:
+            self.frames_skipped += 1
+            # nothing visible changed, so there is no latency to measure
+            self.input_time = None
+            return
+        self.last_render = state
+        self.frames_drawn += 1
         self.display.draw()
+        if self.input_time is not None:
+            self.input_latency = self.clock.ticks_diff(self.clock.ticks_ms(), self.input_time)
+            if self.input_latency > self.input_latency_max:
+                self.input_latency_max = self.input_latency
+            self.input_time = None
 
     def run(self):
         while True:
+            self.update_input()
             self.update_pet()
             self.update_anim()
+            self.buzzer.update()
+            self.draw()
+            self.clock.sleep_ms(30)
+
+    # ======= Cooperative (asyncio) run mode =======
+
+    def request_render(self):
+        if self._render_event is not None:
+            self._render_event.set()
+
+    def _wake_anim(self):
+        # a new animation may be due before the animation task's current sleep ends
+        if self._anim_event is not None:
+            self._anim_event.set()
+
+    def _wake_buzzer(self):
+        if self._buzzer_event is not None:
+            self._buzzer_event.set()
+
+    async def run_async(self):
+        """
+        Cooperative alternative to run(). The pet tick, the animation engine,
+        rendering and input each run as their own task and sleep until their
+        next deadline, so nothing is polled while there is no work to do.
+        Works with uasyncio on the Pico and asyncio on CPython:
+
+            asyncio.run(game.run_async())
+        """
+        asyncio = _asyncio()
+        self._asyncio = asyncio
+        self._render_event = asyncio.Event()
+        self._anim_event = asyncio.Event()
+        self._buzzer_event = asyncio.Event()
+        # button/PIR interrupts set this flag when they queue an edge;
+        # CPython has no ThreadSafeFlag, but its "interrupts" run in the loop
+        flag = getattr(asyncio, "ThreadSafeFlag", None)
+        self._input_flag = flag() if flag is not None else asyncio.Event()
+        self.events.setFlag(self._input_flag)
+
+        tasks = [
+            asyncio.create_task(self._pet_task()),
+            asyncio.create_task(self._anim_task()),
+            asyncio.create_task(self._buzzer_task()),
+            asyncio.create_task(self._input_task()),
+            asyncio.create_task(self._render_task()),
+        ]
+        self.request_render()
+        await asyncio.gather(*tasks)
+
+    async def _sleep_ms(self, ms):
+        asyncio = self._asyncio
+        if hasattr(asyncio, "sleep_ms"):
+            await asyncio.sleep_ms(ms)
+        else:
+            await asyncio.sleep(ms / 1000)
+
+    async def _pet_task(self):
+        while True:
+            await self._sleep_ms(PET_TICK_INTERVAL)
+            self.tick_pet()
+            self.request_render()
+
+    async def _wait_ms(self, event, ms):
+        """ Wait for event to be set, or at most ms (forever if ms < 0) """
+        asyncio = self._asyncio
+        if ms < 0:
+            await event.wait()
+            return
+        try:
+            if hasattr(asyncio, "wait_for_ms"):
+                await asyncio.wait_for_ms(event.wait(), ms)
+            else:
+                await asyncio.wait_for(event.wait(), ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _anim_task(self):
+        event = self._anim_event
+        while True:
+            due = self.anim.next_due(self.clock.ticks_ms())
+            if due != 0:
+                # sleep until the next frame, or until a new animation starts
+                await self._wait_ms(event, due)
+                event.clear()
+            self.update_anim()
+
+    async def _buzzer_task(self):
+        event = self._buzzer_event
+        while True:
+            # sleep until the current note ends, or until a new one is queued
+            await self._wait_ms(event, self.buzzer.timeToNext())
+            event.clear()
+            self.buzzer.update()
+
+    async def _input_task(self):
+        # Interrupts only fill the event queue and set the flag; sleep until they do
+        flag = self._input_flag
+        while True:
+            if self.events.pending() == 0:
+                await flag.wait()
+                if hasattr(flag, "clear"):
+                    flag.clear()
+            self.update_input()
+            if self.input_pending:
+                self.input_pending = False
+                self.request_render()
+
+    async def _render_task(self):
+        event = self._render_event
+        while True:
+            await event.wait()
+            event.clear()
             self.draw()
-            time.sleep_ms(30)
+            # cap the frame rate; further requests are merged into one frame
+            await self._sleep_ms(FRAME_INTERVAL)